@@ -251,7 +251,7 @@ async def root():
     return {
         "service": "CarTunes API",
         "version": "v0.1.0",
-        "active_rooms": len(room_manager.rooms),
+        **room_manager.get_stats(),
     }
 
 
@@ -830,12 +830,11 @@ async def reorder_queue(
         # Remove requests older than config window seconds
         user_bring_to_top_requests[user_id] = [
             req_time for req_time in user_bring_to_top_requests[user_id]
-            if current_time - req_time < config['bring_to_top_throttle']['window_seconds']
+            if current_time - req_time < config['bring_to_top_throttle'].window_seconds
         ]
 
         # Check if user has made 2 or more requests in the last 5 seconds, throttle it
-        if len(user_bring_to_top_requests[user_id]) >= config['bring_to_top_throttle'][
-            'max_requests']:
+        if len(user_bring_to_top_requests[user_id]) >= config['bring_to_top_throttle'].max_requests:
             return {
                 "message": "Queue unchanged, blocked by throttle",
                 "queue": [s.dict() for s in room.queue]
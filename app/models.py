@@ -115,6 +115,9 @@ class Room(BaseModel):
     active_connections: int = 0  # Number of active WebSocket connections
     autoplay: bool = True
     autoplay_playlist: List[Dict[str, Any]] = []
+    has_ever_played: bool = False  # Set once playback has started at least once
+    waiting_for_audio: bool = False  # Playback deferred until audio is ready
+    next_song_seq: int = 0  # Monotonic counter used to build unique song IDs
 
 
 # Response Models
@@ -25,6 +25,9 @@ class RoomManager:
         self.pause_timers: Dict[str, asyncio.Task] = {}  # room_id -> timer task
         self.cleanup_timers: Dict[str, asyncio.Task] = {}  # room_id -> cleanup timer task
         self.maximum_room = maximum_room
+        # Aggregate counters maintained incrementally, so stats never iterate rooms
+        self._active_playing = 0  # Rooms whose playback is currently running
+        self._total_members = 0  # Members across all rooms
 
     # ===== Room Creation =====
 
@@ -72,6 +75,7 @@ class RoomManager:
 
         self.rooms[room_id] = room
         self.user_rooms[user_id] = room_id
+        self._total_members += 1
 
         logger.info(f"Room {room_id} created by user {user_id}")
         return room
@@ -79,6 +83,14 @@ class RoomManager:
     def can_create_room(self) -> bool:
         return len(self.rooms) < self.maximum_room
 
+    def get_stats(self) -> dict:
+        """Get aggregate room statistics without iterating rooms"""
+        return {
+            "active_rooms": len(self.rooms),
+            "playing_rooms": self._active_playing,
+            "total_members": self._total_members
+        }
+
     # ===== Room Information =====
 
     def get_room(self, room_id: str) -> Optional[Room]:
@@ -129,6 +141,7 @@ class RoomManager:
             )
             room.members.append(new_member)
             self.user_rooms[user_id] = room_id
+            self._total_members += 1
             logger.info(f"User {user_id} joined room {room_id}")
 
         # Update activity
@@ -144,11 +157,14 @@ class RoomManager:
         room = self.rooms[room_id]
 
         # Remove user from room
+        members_before = len(room.members)
         room.members = [m for m in room.members if m.user_id != user_id]
         self.user_rooms.pop(user_id, None)
+        self._total_members -= members_before - len(room.members)
 
         # If room is empty, delete it
         if not room.members:
+            self._set_playing(room, False)
             self.rooms.pop(room_id, None)
             logger.info(f"Room {room_id} deleted (no members)")
 
@@ -173,13 +189,13 @@ class RoomManager:
         room = self.get_room(room_id)
         if (room and room.current_song and
                 room.current_song.video_id == video_id and
-                hasattr(room, '_waiting_for_audio') and room._waiting_for_audio):
+                room.waiting_for_audio):
             # Audio is ready, start the countdown
-            room.playback_state.is_playing = True
+            self._set_playing(room, True)
             room.playback_state.current_time = -1.0  # Start countdown
             room.playback_state.last_update = datetime.now()
-            room._has_ever_played = True
-            delattr(room, '_waiting_for_audio')
+            room.has_ever_played = True
+            room.waiting_for_audio = False
 
             logger.info(f"Started audio-ready playback for room {room_id}, video {video_id}")
             return True
@@ -203,7 +219,7 @@ class RoomManager:
 
         # Create song entry
         song = Song(
-            id=f"{room_id}_{len(room.queue)}_{song_data['video_id']}",
+            id=self._next_song_id(room),
             video_id=song_data['video_id'],
             title=song_data['title'],
             channel=song_data.get('channel', 'Unknown Artist'),
@@ -222,15 +238,15 @@ class RoomManager:
             room.current_song = room.queue.pop(0)
             self._update_queue_positions(room)
 
-            if hasattr(room, '_has_ever_played') and room._has_ever_played:
+            if room.has_ever_played:
                 # Room ran out of music - wait for audio ready before playing
                 room.playback_state.current_time = -abs(config['song_start_delay_seconds'])
-                room.playback_state.is_playing = False  # Don't start until audio ready
-                room._waiting_for_audio = True  # Flag to track waiting state
+                self._set_playing(room, False)  # Don't start until audio ready
+                room.waiting_for_audio = True  # Flag to track waiting state
             else:
                 # Newly created room - don't auto-play
                 room.playback_state.current_time = 0.0
-                room.playback_state.is_playing = False
+                self._set_playing(room, False)
 
             room.playback_state.last_update = datetime.now()
 
@@ -249,13 +265,13 @@ class RoomManager:
             room.current_song = room.queue.pop(0)
             # Always wait for audio ready before starting
             room.playback_state.current_time = -abs(config['song_start_delay_seconds'])
-            room.playback_state.is_playing = False  # Don't start until audio ready
+            self._set_playing(room, False)  # Don't start until audio ready
             room.playback_state.last_update = datetime.now()
-            room._waiting_for_audio = True
+            room.waiting_for_audio = True
             self._update_queue_positions(room)
         else:
             room.current_song = None
-            room.playback_state.is_playing = False
+            self._set_playing(room, False)
 
         # Update activity
         room.last_activity = datetime.now()
@@ -268,14 +284,14 @@ class RoomManager:
         if not room:
             return False
 
-        room.playback_state.is_playing = is_playing
+        self._set_playing(room, is_playing)
         if current_time is not None:
             room.playback_state.current_time = current_time
         room.playback_state.last_update = datetime.now()
 
         # Track that this room has been played at least once
         if is_playing:
-            room._has_ever_played = True
+            room.has_ever_played = True
 
         # Update activity
         room.last_activity = datetime.now()
@@ -322,6 +338,19 @@ class RoomManager:
 
         return True
 
+    def _set_playing(self, room: Room, is_playing: bool):
+        """Set playback state and keep the playing rooms counter in sync"""
+        if room.playback_state.is_playing != is_playing:
+            self._active_playing += 1 if is_playing else -1
+        room.playback_state.is_playing = is_playing
+
+    @staticmethod
+    def _next_song_id(room: Room) -> str:
+        """Generate a song ID that is unique for the room's whole lifetime"""
+        song_id = f"{room.room_id}_{room.next_song_seq}"
+        room.next_song_seq += 1
+        return song_id
+
     @staticmethod
     def _update_queue_positions(room: Room):
         """Update position numbers for all songs in queue"""
@@ -345,6 +374,25 @@ class RoomManager:
         logger.info(f"Room {room_id} autoplay toggled to: {room.autoplay}")
         return room.autoplay
 
+    @staticmethod
+    def _drain_autoplay_playlist(room: Room) -> Song:
+        """Move the first song of autoplay_playlist into the queue"""
+        next_song_data = room.autoplay_playlist.pop(0)
+        new_song = Song(
+            id=RoomManager._next_song_id(room),
+            video_id=next_song_data['video_id'],
+            title=next_song_data['title'],
+            channel=next_song_data.get('channel', 'Unknown Artist'),
+            duration=utils.convert_duration_to_seconds(next_song_data['duration']) or 0,
+            thumbnail=next_song_data.get('thumbnail', ''),
+            requester_id="autoplay_system",
+            requester_name="自動播放",
+            added_at=datetime.now(),
+            position=len(room.queue)
+        )
+        room.queue.append(new_song)
+        return new_song
+
     async def check_and_add_autoplay_song(self, room_id: str) -> Optional[Song]:
         """Check if autoplay should add a song, add it if needed"""
         room = self.get_room(room_id)
@@ -357,21 +405,7 @@ class RoomManager:
 
         # First check if we have songs in autoplay_playlist
         if room.autoplay_playlist:
-            # Get first song from playlist
-            next_song_data = room.autoplay_playlist.pop(0)
-            new_song = Song(
-                id=f"{room_id}_autoplay_{len(room.queue)}_{next_song_data['video_id']}",
-                video_id=next_song_data['video_id'],
-                title=next_song_data['title'],
-                channel=next_song_data.get('channel', 'Unknown Artist'),
-                duration=utils.convert_duration_to_seconds(next_song_data['duration']) or 0,
-                thumbnail=next_song_data.get('thumbnail', ''),
-                requester_id="autoplay_system",
-                requester_name="自動播放",
-                added_at=datetime.now(),
-                position=len(room.queue)
-            )
-            room.queue.append(new_song)
+            new_song = self._drain_autoplay_playlist(room)
             logger.info(f"Added autoplay song from playlist: {new_song.title}")
             return new_song
 
@@ -381,35 +415,22 @@ class RoomManager:
         if search_engine == 'youtube_music':
             recommendations = await get_yt_music_recommendations(room.current_song.video_id)
             if recommendations:
-                valid_songs = []
-                for rec in recommendations:
-                    if rec.get('duration') and utils.check_video_duration(rec['duration']):
-                        valid_songs.append({
-                            'video_id': rec['id'],
-                            'title': rec['title'],
-                            'channel': rec.get('channel', 'Unknown Artist'),
-                            'duration': rec['duration'],
-                            'thumbnail': rec.get('thumbnail', '')
-                        })
+                valid_songs = [
+                    {
+                        'video_id': rec['id'],
+                        'title': rec['title'],
+                        'channel': rec.get('channel', 'Unknown Artist'),
+                        'duration': rec['duration'],
+                        'thumbnail': rec.get('thumbnail', '')
+                    }
+                    for rec in recommendations
+                    if rec.get('duration') and utils.check_video_duration(rec['duration'])
+                ]
                 if valid_songs:
-                    # Add first song to queue
-                    first_song = valid_songs[0]
-                    new_song = Song(
-                        id=f"{room_id}_autoplay_{len(room.queue)}_{first_song['video_id']}",
-                        video_id=first_song['video_id'],
-                        title=first_song['title'],
-                        channel=first_song['channel'],
-                        duration=utils.convert_duration_to_seconds(first_song['duration']) or 0,
-                        thumbnail=first_song['thumbnail'],
-                        requester_id="autoplay_system",
-                        requester_name="自動播放",
-                        added_at=datetime.now(),
-                        position=len(room.queue)
-                    )
-                    room.queue.append(new_song)
-
-                    # Save rest to autoplay_playlist
-                    room.autoplay_playlist = valid_songs[1:]
+                    # Replace the playlist with this batch, even if another caller filled it during the await
+                    room.autoplay_playlist = valid_songs
+                    # Queue the first song, the rest stays in autoplay_playlist
+                    new_song = self._drain_autoplay_playlist(room)
                     logger.info(f"Added autoplay song from YouTube Music for room {room_id}")
                     return new_song
 
@@ -419,7 +440,7 @@ class RoomManager:
                 for rec in recommendations:
                     if rec.get('duration') and utils.check_video_duration(rec['duration']):
                         new_song = Song(
-                            id=f"{room_id}_autoplay_{len(room.queue)}_{rec['video_id']}",
+                            id=self._next_song_id(room),
                             video_id=rec['id'],
                             title=rec['title'],
                             channel=rec.get('channel', 'Unknown Artist'),
@@ -490,7 +511,7 @@ class RoomManager:
         if room.current_song and room.playback_state.is_playing:
             # Update current time before pausing
             current_time = self.get_current_playback_time(room_id)
-            room.playback_state.is_playing = False
+            self._set_playing(room, False)
             room.playback_state.current_time = current_time
             room.playback_state.last_update = datetime.now()
             logger.info(f"Music paused in room {room_id} due to no active connections")
@@ -529,6 +550,8 @@ class RoomManager:
                 self.cancel_pause_timer(room_id)
 
                 # Remove room
+                self._total_members -= len(room.members)
+                self._set_playing(room, False)
                 self.rooms.pop(room_id, None)
                 logger.info(f"Closed inactive room: {room_id}")
 
@@ -569,6 +592,8 @@ class RoomManager:
             logger.info(f"Deleted room {room_id} ({len(room.members)} members)")
 
         self.rooms.clear()
+        self._active_playing = 0
+        self._total_members = 0
         self.pause_timers.clear()
         self.cleanup_timers.clear()
         self.cleanup_timers.clear()
@@ -1,10 +1,48 @@
+import json
 import re
 import sys
 import urllib.parse
-from os.path import exists
+from functools import lru_cache
+from os.path import exists, getmtime
+from typing import NamedTuple
 
 import yaml
-from yaml import SafeLoader
+
+try:  # Prefer the libyaml-backed loader when PyYAML was built with it
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+
+class BringToTopThrottle(NamedTuple):
+    """Throttle settings for the BringSongToTop button"""
+    max_requests: int
+    window_seconds: int
+
+
+_CONFIG_KEYS = frozenset({
+    'line_channel_access_token', 'line_channel_secret', 'api_endpoints_port', 'line_webhook_port',
+    'frontend_url', 'song_start_delay_seconds', 'song_length_limit', 'audio_quality_kbps',
+    'max_cache_size_mb', 'cache_duration_hours', 'autoplay_default', 'autoplay_search_engine',
+    'hl_param', 'gl_param', 'loudness_normalization', 'numeric_room_code',
+    'pause_music_after_no_connections', 'room_cleanup_after_inactivity', 'maximum_room',
+    'progress_broadcast_interval', 'action_throttle_seconds', 'bring_to_top_throttle',
+    'line_message_throttle_seconds'
+})
+_BRING_TO_TOP_THROTTLE_KEYS = frozenset({'max_requests', 'window_seconds'})
+
+_YOUTUBE_DOMAINS = frozenset({
+    'youtube.com', 'www.youtube.com', 'm.youtube.com',
+    'youtu.be', 'music.youtube.com'
+})
+
+# Single pattern covering watch (incl. YouTube Music), short, embed, live and shorts URLs.
+# The lookahead makes sure the video ID is exactly 11 characters long.
+_YOUTUBE_VIDEO_ID_PATTERN = re.compile(
+    r'(?:watch\?(?:[^#\s]*&)?v=|youtu\.be/|/embed/|/live/|/shorts/)'
+    r'([a-zA-Z0-9_-]{11})(?![a-zA-Z0-9_-])',
+    re.IGNORECASE
+)
 
 
 def config_file_generator():
@@ -119,11 +157,37 @@ line_message_throttle_seconds: 0.8
     sys.exit()
 
 
+def _load_config_data() -> dict:
+    """Load raw data of config.yml.
+
+    A JSON copy of the parsed YAML is kept in .config.json, and it's used instead of config.yml
+    as long as it's not older than config.yml, since JSON parsing is much faster than YAML.
+    """
+    try:
+        if exists('./.config.json') and getmtime('./.config.json') >= getmtime('./config.yml'):
+            with open('.config.json', encoding="utf8") as file:
+                return json.load(file)
+    except (OSError, ValueError):
+        pass  # Unreadable or corrupted JSON copy, fall back to config.yml
+
+    with open('config.yml', encoding="utf8") as file:
+        data = yaml.load(file, Loader=SafeLoader)
+
+    try:
+        with open('.config.json', 'w', encoding="utf8") as file:
+            json.dump(data, file)
+    except (OSError, TypeError, ValueError):
+        pass  # The JSON copy is only an optimization
+    return data
+
+
+@lru_cache(maxsize=1)
 def read_config():
     """Read config file.
 
     Check if config file exists, if not, create one.
     if exists, read config file and return config with dict type.
+    The parsed config is cached, so config.yml is only parsed once per process.
 
     :rtype: dict
     """
@@ -133,60 +197,41 @@ def read_config():
             config_file_generator()
 
     try:
-        with open('config.yml', encoding="utf8") as file:
-            data = yaml.load(file, Loader=SafeLoader)
-            config = {
-                'line_channel_access_token': data['line_channel_access_token'],
-                'line_channel_secret': data['line_channel_secret'],
-                'api_endpoints_port': data['api_endpoints_port'],
-                'line_webhook_port': data['line_webhook_port'],
-                'frontend_url': data['frontend_url'],
-                'song_start_delay_seconds': data['song_start_delay_seconds'],
-                'song_length_limit': data['song_length_limit'],
-                'audio_quality_kbps': data['audio_quality_kbps'],
-                'max_cache_size_mb': data['max_cache_size_mb'],
-                'cache_duration_hours': data['cache_duration_hours'],
-                'autoplay_default': data['autoplay_default'],
-                'autoplay_search_engine': data['autoplay_search_engine'],
-                'hl_param': data['hl_param'],
-                'gl_param': data['gl_param'],
-                'loudness_normalization': data['loudness_normalization'],
-                'numeric_room_code': data['numeric_room_code'],
-                'pause_music_after_no_connections': data['pause_music_after_no_connections'],
-                'room_cleanup_after_inactivity': data['room_cleanup_after_inactivity'],
-                'maximum_room': data['maximum_room'],
-                'progress_broadcast_interval': data['progress_broadcast_interval'],
-                'action_throttle_seconds': data['action_throttle_seconds'],
-                'bring_to_top_throttle': {
-                    'max_requests': data['bring_to_top_throttle']['max_requests'],
-                    'window_seconds': data['bring_to_top_throttle']['window_seconds']
-                },
-                'line_message_throttle_seconds': data['line_message_throttle_seconds']
-            }
-            file.close()
-
-            # Validate if LINE channel access token and secret are provided
-            if not config['line_channel_access_token'] or not config['line_channel_secret']:
-                print("Please fill in LINE channel access token and secret in config.yml.\n"
-                      "You can get it from https://developers.line.biz/console/")
-                sys.exit()
-
-            # Validate if autoplay_search_engine is set to a valid value
-            if config['autoplay_search_engine'] not in ['youtube_music', 'youtube']:
-                print("Invalid autoplay_search_engine value in config.yml. "
-                      "Please set it to 'youtube_music' or 'youtube'.")
-                sys.exit()
-            return config
-    except (KeyError, TypeError):
+        data = _load_config_data()
+        # Every setting must be present, otherwise show the error below
+        if not _CONFIG_KEYS <= data.keys() or \
+                not _BRING_TO_TOP_THROTTLE_KEYS <= data['bring_to_top_throttle'].keys():
+            raise KeyError
+        config = data
+        config['bring_to_top_throttle'] = BringToTopThrottle(
+            data['bring_to_top_throttle']['max_requests'],
+            data['bring_to_top_throttle']['window_seconds']
+        )
+
+        # Validate if LINE channel access token and secret are provided
+        if not config['line_channel_access_token'] or not config['line_channel_secret']:
+            print("Please fill in LINE channel access token and secret in config.yml.\n"
+                  "You can get it from https://developers.line.biz/console/")
+            sys.exit()
+
+        # Validate if autoplay_search_engine is set to a valid value
+        if config['autoplay_search_engine'] not in ['youtube_music', 'youtube']:
+            print("Invalid autoplay_search_engine value in config.yml. "
+                  "Please set it to 'youtube_music' or 'youtube'.")
+            sys.exit()
+        return config
+    except (KeyError, TypeError, AttributeError):
         print(
             "An error occurred while reading config.yml, please check if the file is corrected filled.\n"
             "If the problem can't be solved, consider delete config.yml and restart the program.\n")
         sys.exit()
 
 
+@lru_cache(maxsize=4096)
 def convert_duration_to_seconds(duration_str: str | int) -> int | None:
     """Convert duration string like '3:47' to seconds.
     If duration is already an integer, return it directly.
+    Results are memoized since the same durations repeat across recommendation batches.
     """
     if not duration_str or duration_str == 'N/A':
         return None
@@ -196,20 +241,21 @@ def convert_duration_to_seconds(duration_str: str | int) -> int | None:
         return duration_str
 
     try:
-        # Handle formats like "3:47" or "1:23:45"
-        parts = duration_str.split(':')
-        if len(parts) == 2:  # MM:SS
-            minutes, seconds = map(int, parts)
-            return minutes * 60 + seconds
-        elif len(parts) == 3:  # HH:MM:SS
-            hours, minutes, seconds = map(int, parts)
-            return hours * 3600 + minutes * 60 + seconds
-        else:
+        # Handle formats like "3:47" or "1:23:45", partition avoids allocating a list
+        first, sep, rest = duration_str.partition(':')
+        if not sep:
             return None
+        second, sep, third = rest.partition(':')
+        if not sep:  # MM:SS
+            return int(first) * 60 + int(second)
+        if ':' in third:
+            return None
+        return int(first) * 3600 + int(second) * 60 + int(third)  # HH:MM:SS
     except (ValueError, TypeError):
         return None
 
 
+@lru_cache(maxsize=4096)
 def check_video_duration(duration: str) -> bool:
     """Check if the video duration is within the limit."""
     seconds = convert_duration_to_seconds(duration)
@@ -223,23 +269,20 @@ def is_url(text: str) -> bool:
     """Check if the given text is a valid URL."""
     try:
         result = urllib.parse.urlparse(text)
-        return all([result.scheme, result.netloc])
+        return bool(result.scheme and result.netloc)
     except Exception:
         return False
 
 
 def is_youtube_url(url: str) -> bool:
     """Check if the given URL is a YouTube URL."""
-    if not is_url(url):
+    # One urlparse call covers the is_url check too, and normalizes scheme case and surrounding whitespace
+    try:
+        parsed = urllib.parse.urlparse(url)
+    except Exception:
         return False
 
-    parsed = urllib.parse.urlparse(url)
-    youtube_domains = [
-        'youtube.com', 'www.youtube.com', 'm.youtube.com',
-        'youtu.be', 'music.youtube.com'
-    ]
-
-    return parsed.netloc.lower() in youtube_domains
+    return bool(parsed.scheme) and parsed.netloc.lower() in _YOUTUBE_DOMAINS
 
 
 def extract_video_id_from_url(url: str) -> str | None:
@@ -250,28 +293,5 @@ def extract_video_id_from_url(url: str) -> str | None:
     # Remove any whitespace and normalize URL
     url = url.strip()
 
-    # Patterns for different YouTube URL formats
-    patterns = [
-        # Standard watch URLs
-        r'(?:youtube\.com|m\.youtube\.com)/watch\?.*v=([a-zA-Z0-9_-]+)',
-        # Short URLs
-        r'youtu\.be/([a-zA-Z0-9_-]+)',
-        # Embed URLs
-        r'(?:youtube\.com|m\.youtube\.com)/embed/([a-zA-Z0-9_-]+)',
-        # YouTube Music URLs
-        r'music\.youtube\.com/watch\?.*v=([a-zA-Z0-9_-]+)',
-        # Live URLs
-        r'(?:youtube\.com|m\.youtube\.com)/live/([a-zA-Z0-9_-]+)',
-        # Shorts URLs
-        r'(?:youtube\.com|m\.youtube\.com)/shorts/([a-zA-Z0-9_-]+)',
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, url, re.IGNORECASE)
-        if match:
-            video_id = match.group(1)
-            # Additional validation for video ID format
-            if re.match(r'^[a-zA-Z0-9_-]{11}$', video_id):
-                return video_id
-
-    return None
+    match = _YOUTUBE_VIDEO_ID_PATTERN.search(url)
+    return match.group(1) if match else None
@@ -2,9 +2,11 @@
 WebSocket connection management for real-time updates
 """
 
+import asyncio
 import logging
+import time
 from datetime import datetime
-from typing import Dict, Set, Any
+from typing import Dict, List, Set, Any
 
 from fastapi import WebSocket
 
@@ -12,27 +14,24 @@ import utilities as utils
 from models import WSMessage, WSMessageType
 
 logger = logging.getLogger(__name__)
-config = utils.read_config()
 
 
 class ConnectionManager:
     def __init__(self):
-        # room_id -> set of WebSocket connections
-        self.active_connections: Dict[str, Set[WebSocket]] = {}
+        # room_id -> list of WebSocket connections
+        self.active_connections: Dict[str, List[WebSocket]] = {}
         # websocket -> (room_id, user_id)
         self.connection_info: Dict[WebSocket, tuple] = {}
-        self.last_pong: Dict[WebSocket, datetime] = {}
+        # websocket -> time.monotonic() of the last pong, only used for elapsed-time checks
+        self.last_pong: Dict[WebSocket, float] = {}
 
     async def connect(self, websocket: WebSocket, room_id: str, user_id: str, room_manager=None):
         """Add new WebSocket connection"""
         await websocket.accept()
 
-        if room_id not in self.active_connections:
-            self.active_connections[room_id] = set()
-
-        self.active_connections[room_id].add(websocket)
+        self.active_connections.setdefault(room_id, []).append(websocket)
         self.connection_info[websocket] = (room_id, user_id)
-        self.last_pong[websocket] = datetime.now()
+        self.last_pong[websocket] = time.monotonic()
 
         # Cancel both timers since room now has connections
         if room_manager:
@@ -51,12 +50,16 @@ class ConnectionManager:
             room_id, user_id = connection_data
 
             if room_id in self.active_connections:
-                self.active_connections[room_id].discard(websocket)
+                try:
+                    self.active_connections[room_id].remove(websocket)
+                except ValueError:
+                    pass
 
                 # If room has no more connections, start both timers
                 if len(self.active_connections[room_id]) == 0:
                     if room_manager:
-                        # Start pause timer (short delay)
+                        # Start pause timer (short delay), config is read lazily on first use
+                        config = utils.read_config()
                         room_manager.start_pause_timer(room_id,
                                                        config['pause_music_after_no_connections'])
                         # Start cleanup timer (long delay)
@@ -73,7 +76,7 @@ class ConnectionManager:
 
     async def handle_pong(self, websocket: WebSocket):
         """Handle a pong message from a client."""
-        self.last_pong[websocket] = datetime.now()
+        self.last_pong[websocket] = time.monotonic()
 
     async def send_personal_message(self, message: WSMessage, websocket: WebSocket):
         """Send message to specific connection"""
@@ -89,20 +92,21 @@ class ConnectionManager:
         if room_id not in self.active_connections:
             return
 
-        disconnected = set()
+        payload = message.json()  # Serialize once, the payload is the same for every connection
 
-        for connection in self.active_connections[
-            room_id].copy():  # Use copy to avoid modification during iteration
-            if connection != exclude:
-                try:
-                    await connection.send_text(message.json())
-                except Exception as e:
-                    logger.error(f"Error broadcasting to connection: {e}")
-                    disconnected.add(connection)
+        # Send to all connections concurrently, so a slow client doesn't delay the others.
+        # The generator is fully consumed before anything is awaited, so no snapshot is needed.
+        connections = self.active_connections[room_id]
+        await asyncio.gather(*(self._send_payload(c, payload) for c in connections if c != exclude))
 
-        # Clean up disconnected connections
-        for connection in disconnected:
-            self.disconnect(connection)
+    async def _send_payload(self, websocket: WebSocket, payload: str):
+        """Send serialized message to a connection of a broadcast, drop it if broken"""
+        try:
+            await websocket.send_text(payload)
+        except Exception as e:
+            logger.error(f"Error broadcasting to connection: {e}")
+            # Clean up disconnected connection
+            self.disconnect(websocket)
 
     async def broadcast_user_joined(self, room_id: str, user_id: str, user_name: str):
         """Notify room when user joins"""
@@ -212,7 +216,7 @@ class ConnectionManager:
 
     def get_room_connection_count(self, room_id: str) -> int:
         """Get number of active connections in a room"""
-        return len(self.active_connections.get(room_id, set()))
+        return len(self.active_connections.get(room_id, ()))
 
     def get_all_rooms_with_connections(self) -> Set[str]:
         """Get all room IDs that have active connections"""
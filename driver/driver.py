@@ -1,7 +1,10 @@
 import os
+import sys
 import json
 import time
 import csv
+import signal
+import logging
 from datetime import datetime
 
 from dotenv import load_dotenv
@@ -11,13 +14,25 @@ from mapek.Monitor import Monitor
 from mapek.Analyzer import Analyzer
 from mapek.Planner import Planner
 from mapek.Executor import Executor
-from utils import init_csv, append_to_csv
+from utils import BufferedCsvAppender
+
+log = logging.getLogger("mapek")
+
+class CycleFlushedHandler(logging.StreamHandler):
+    # skip the flush after every record, stdout is flushed once per adaptation cycle instead
+    def flush(self):
+        pass
+
+def exit_on_sigterm(signum, frame):
+    # leave through SystemExit so atexit handlers run (the dataset appender writes its buffered rows)
+    sys.exit(128 + signum)
 
 def main():
     # Create a CSV file for the dataset
     csv_file = "datasets/cartunes_metrics_dataset.csv"
-    if not os.path.exists("datasets"):
-        os.mkdir("datasets")
+    os.makedirs("datasets", exist_ok=True)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s", handlers=[CycleFlushedHandler(sys.stdout)])
 
     # Read .env file
     load_dotenv()
@@ -27,6 +42,8 @@ def main():
     apikey = os.getenv("APIKEY")
     url = os.getenv("URL")
     sleep = int(os.getenv("SLEEP", "60"))
+    # cycles of dataset rows kept in memory between writes to the CSV
+    csv_flush_every = int(os.getenv("CSV_FLUSH_EVERY", "5"))
 
     # Target service
     service_to_use = [
@@ -70,12 +87,16 @@ def main():
         ("kubernetes.deployment.replicas.available", "max"),
     ]
 
-    # Initialize CSV file
-    init_csv(csv_file)
-    
+    # Initialize CSV file, kept open for the whole run instead of reopening it every cycle
+    dataset = BufferedCsvAppender(csv_file, service_to_use, csv_flush_every)
+    signal.signal(signal.SIGTERM, exit_on_sigterm)
+
     # Initialize components
     knowledge = Knowledge("./mapek/knowledge.json")
     resources = knowledge.get_resources()
+    thresholds = knowledge.get_threshold()
+    weights = knowledge.get_weight()
+    resource_limitations = knowledge.get_resource_limitations()
     current_configs = {
         svc: {
             "requests": {
@@ -95,64 +116,69 @@ def main():
     }
 
     monitor = Monitor(url, apikey, guid, sleep)
-    analyzer = Analyzer(analyze_metrics, service_to_use, knowledge.get_threshold(), knowledge.get_weight())
-    planner = Planner(service_to_use, knowledge.get_resource_limitations(), knowledge.get_resources(), knowledge.get_threshold()["roi"])
+    analyzer = Analyzer(analyze_metrics, service_to_use, thresholds, weights)
+    planner = Planner(service_to_use, resource_limitations, resources, thresholds["roi"])
     executor = Executor()
 
-    print("")
-    print("Starting MAPE-K adaptation loop...")
+    log.info("")
+    log.info("Starting MAPE-K adaptation loop...")
     cycle_count = 0
 
     # Start monitor and analyze
     while True:
         cycle_count += 1
-        print(f"\n=== Adaptation Cycle {cycle_count} ===")
-        print("")
+        log.info("\n=== Adaptation Cycle %d ===", cycle_count)
+        log.info("")
         # MONITOR: Collect metrics
-        print("[Monitoring Stage]")
-        print("Getting metrics from IBM Cloud...")
-        print("")
+        log.info("[Monitoring Stage]")
+        log.info("Getting metrics from IBM Cloud...")
+        log.info("")
         qos_data = {}
-        for metric, agg in monitor_metrics:
-            res = monitor.fetch_data_from_ibm(metric, agg)
+        analyzer.begin_cycle()
+        # aggregate each metric as soon as its fetch completes instead of in a second pass
+        for (metric, agg), res in monitor.fetch_many(monitor_metrics):
             if res:
                 qos_data[(metric, agg)] = res
+                analyzer.aggregate(metric, agg, res)
             else:
-                print(f"Failed to fetch {metric} with {agg} aggregation")
+                log.error("Failed to fetch %s with %s aggregation", metric, agg)
         qoe_data = monitor.fetch_data_from_cartunes()
-        print("")
+        log.info("")
         
         # ANALYZE: Process metrics
-        print("[Analyzing Stage]")
-        analysis_results = analyzer.process_data(qos_data, qoe_data)
+        log.info("[Analyzing Stage]")
+        analysis_results = analyzer.analyze(qoe_data)
         if len(analysis_results) == 0:
-            print("Need to gather more data to continue, preventing from scaling flapping")
+            log.info("Need to gather more data to continue, preventing from scaling flapping")
+            sys.stdout.flush()
             time.sleep(sleep)
             continue
 
         # PLAN: Generate adaptation decisions
-        print("[Planning Stage]")
+        log.info("[Planning Stage]")
         decisions, new_configs, system_situations = planner.evaluate_services(analysis_results, current_configs)
-        print("")
+        log.info("")
 
         # EXECUTE: Apply adaptations
-        print("[Executing Stage]")
+        log.info("[Executing Stage]")
         if system_situations == "qoe_unhealthy":
             sucess = executor.execute_qoe_plan(decisions, new_configs, system_situations)
         else: 
             success = executor.execute_qos_plan(decisions, current_configs, system_situations)
 
         if success:
-            print("Successfully executed adaptation")
+            log.info("Successfully executed adaptation")
             current_configs = new_configs
         else:
-            print("Failed to execute adaptation")
+            log.error("Failed to execute adaptation")
 
         # KNOWLEDGE: Store data with adaptation information
         timestamp = datetime.now().isoformat()
-        append_to_csv(csv_file, timestamp, qos_data, service_to_use)
+        dataset.append(timestamp, qos_data)
+        knowledge.flush()
 
         # wait for next round
+        sys.stdout.flush()
         time.sleep(sleep)
 
 if __name__ == "__main__":
@@ -1,12 +1,69 @@
 import json
+import logging
 from collections import deque
-import pandas as pd
+from itertools import repeat
+import numpy as np
+
+log = logging.getLogger("mapek.analyzer")
+
+class RollingWindow:
+    # sliding window keeping a running sum, so the average is O(1) per update
+    def __init__(self, maxlen):
+        self.values = deque(maxlen=maxlen)
+        self.total = 0.0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def append(self, value):
+        values = self.values
+        if len(values) == values.maxlen:
+            self.total -= values[0]
+            self.evictions += 1
+        values.append(value)
+        # re-sum once per full turnover so float drift (or a NaN sample) can't stick around forever
+        if self.evictions == values.maxlen:
+            self.evictions = 0
+            self.total = sum(values)
+        else:
+            self.total += value
+
+    @property
+    def avg(self):
+        return self.total / len(self.values)
 
 class Analyzer:
+    # (metric_id, aggregation) -> field used by the analysis
+    METRIC_DISPATCH = {
+        ("net.request.time.in", "avg"): "latency_avg",
+        ("net.request.time.in", "max"): "latency_max",
+        ("net.request.count.in", "sum"): "request_count",
+        ("net.bytes.total", "sum"): "request_byte_total",
+        ("net.http.error.count", "sum"): "errors",
+        ("cpu.quota.used.percent", "avg"): "cpu",
+        ("memory.limit.used.percent", "avg"): "memory",
+        ("kubernetes.deployment.replicas.available", "max"): "available_replicas",
+    }
+    FIELDS = (
+        "latency_avg", "latency_max", "request_count", "request_byte_total",
+        "errors", "cpu", "memory", "available_replicas"
+    )
+
     def __init__(self, analyze_metrics, service_to_use, thresholds, weights):
         self.window_size = 5
         self.metrics = analyze_metrics
         self.services = service_to_use
+        self._svc_to_idx = {svc: i for i, svc in enumerate(service_to_use)}
+        self._metric_cols = {metric: j for j, metric in enumerate(analyze_metrics)}
+
+        # per-cycle metric matrix: one row per service, one column per analyzed metric
+        field_col = {self.METRIC_DISPATCH[metric]: j for j, metric in enumerate(analyze_metrics)
+                     if metric in self.METRIC_DISPATCH}
+        # fields whose metric is not analyzed read the trailing column, which always stays 0
+        missing = len(analyze_metrics)
+        self._field_cols = [field_col.get(field, missing) for field in self.FIELDS]
+        self._matrix = np.zeros((len(service_to_use), len(analyze_metrics) + 1))
 
         # sliding windows
         self.deque_keys = [
@@ -14,7 +71,7 @@ class Analyzer:
             "disk_usage", "cache_hit_ratio", "avg_playback_latency", "avg_download_time"
         ]
         self.service_deque = {
-            svc: {key: deque(maxlen=self.window_size) for key in self.deque_keys}
+            svc: {key: RollingWindow(self.window_size) for key in self.deque_keys}
             for svc in service_to_use
         }
 
@@ -41,6 +98,19 @@ class Analyzer:
         self.cache_hit_ratio_threshold_low = thresholds["cache_hit_ratio"]["low"]
         self.disk_usage_threshold = thresholds["disk_usage"]
 
+        # loop-invariant values packed once, unpacked into locals per evaluation
+        self._qos_thresholds = (
+            self.cpu_threshold_low, self.cpu_threshold_high,
+            self.memory_threshold_low, self.memory_threshold_high,
+            self.latency_avg_threshold, self.error_rate_threshold
+        )
+        self._qos_weights = (self.cpu_weight, self.memory_weight, self.latency_weight, self.error_rate_weight)
+        self._qoe_thresholds = (
+            self.avg_playback_latency_threshold_low, self.avg_playback_latency_threshold_high,
+            self.avg_download_time_threshold_low, self.avg_download_time_threshold_high,
+            self.cache_hit_ratio_threshold_low, self.disk_usage_threshold
+        )
+
     def _evaluate_metrics(self, svc, cpu, memory, latency_avg, latency_max, request_count,
                           request_per_second, request_byte_total, error_rate,
                           available_replicas, disk_usage, cache_hit_ratio,
@@ -54,21 +124,32 @@ class Analyzer:
         deques["latency_avg_deque"].append(latency_avg / 1_000_000)
         deques["error_rate_deque"].append(error_rate)
 
-        cpu_avg = sum(deques["cpu_deque"]) / len(deques["cpu_deque"])
-        memory_avg = sum(deques["memory_deque"]) / len(deques["memory_deque"])
-        latency_avg_avg = sum(deques["latency_avg_deque"]) / len(deques["latency_avg_deque"])
-        error_rate_avg = sum(deques["error_rate_deque"]) / len(deques["error_rate_deque"])
-
         # QoE windows
         deques["disk_usage"].append(disk_usage)
         deques["cache_hit_ratio"].append(cache_hit_ratio)
         deques["avg_playback_latency"].append(avg_playback_latency)
         deques["avg_download_time"].append(avg_download_time)
 
-        disk_usage_avg = sum(deques["disk_usage"]) / len(deques["disk_usage"])
-        cache_hit_ratio_avg = sum(deques["cache_hit_ratio"]) / len(deques["cache_hit_ratio"])
-        avg_playback_latency_avg = sum(deques["avg_playback_latency"]) / len(deques["avg_playback_latency"])
-        avg_download_time_avg = sum(deques["avg_download_time"]) / len(deques["avg_download_time"])
+        # not enough samples yet, skip computing the window averages at all
+        confidence = len(deques["cpu_deque"]) / self.window_size
+        
+        if confidence < 0.8:
+            return None
+
+        cpu_avg = deques["cpu_deque"].avg
+        memory_avg = deques["memory_deque"].avg
+        latency_avg_avg = deques["latency_avg_deque"].avg
+        error_rate_avg = deques["error_rate_deque"].avg
+
+        disk_usage_avg = deques["disk_usage"].avg
+        cache_hit_ratio_avg = deques["cache_hit_ratio"].avg
+        avg_playback_latency_avg = deques["avg_playback_latency"].avg
+        avg_download_time_avg = deques["avg_download_time"].avg
+
+        cpu_low, cpu_high, memory_low, memory_high, latency_avg_thr, error_rate_thr = self._qos_thresholds
+        cpu_weight, memory_weight, latency_weight, error_rate_weight = self._qos_weights
+        (playback_low, playback_high, download_low, download_high,
+         cache_hit_low, disk_usage_thr) = self._qoe_thresholds
 
         qos_unhealthy = set()
         qoe_unhealthy = set()
@@ -93,57 +174,52 @@ class Analyzer:
             "qoe_unhealthy_metrics": qoe_unhealthy
         }
 
-        confidence = len(deques["cpu_deque"]) / self.window_size
-        
-        if confidence < 0.8:
-            return None
-
-        cpu_util = self._normalize_high_is_good(self.cpu_threshold_low, self.cpu_threshold_high, cpu_avg)
-        mem_util = self._normalize_high_is_good(self.memory_threshold_low, self.memory_threshold_high, memory_avg)
-        latency_util = self._normalize_low_is_good(self.latency_avg_threshold, latency_avg_avg)
-        error_util = self._normalize_low_is_good(self.error_rate_threshold, error_rate_avg)
+        cpu_util = self._normalize_high_is_good(cpu_low, cpu_high, cpu_avg)
+        mem_util = self._normalize_high_is_good(memory_low, memory_high, memory_avg)
+        latency_util = self._normalize_low_is_good(latency_avg_thr, latency_avg_avg)
+        error_util = self._normalize_low_is_good(error_rate_thr, error_rate_avg)
 
         qos_utility = (
-            cpu_util * self.cpu_weight +
-            mem_util * self.memory_weight +
-            latency_util * self.latency_weight +
-            error_util * self.error_rate_weight
+            cpu_util * cpu_weight +
+            mem_util * memory_weight +
+            latency_util * latency_weight +
+            error_util * error_rate_weight
         )
         result["qos_overall_utility"] = qos_utility
 
-        if cpu_avg > self.cpu_threshold_high:
+        if cpu_avg > cpu_high:
             qos_unhealthy.add("cpu_high")
-        elif cpu_avg < self.cpu_threshold_low:
+        elif cpu_avg < cpu_low:
             qos_unhealthy.add("cpu_low")
 
-        if memory_avg > self.memory_threshold_high:
+        if memory_avg > memory_high:
             qos_unhealthy.add("memory_high")
-        elif memory_avg < self.memory_threshold_low:
+        elif memory_avg < memory_low:
             qos_unhealthy.add("memory_low")
 
-        if latency_avg_avg > self.latency_avg_threshold:
+        if latency_avg_avg > latency_avg_thr:
             qos_unhealthy.add("latency_avg_high")
 
-        if error_rate_avg > self.error_rate_threshold:
+        if error_rate_avg > error_rate_thr:
             qos_unhealthy.add("error_rate_high")
 
         if available_replicas <= 0:
             qos_unhealthy.add("no_replicas")
 
-        if avg_playback_latency_avg > self.avg_playback_latency_threshold_high:
+        if avg_playback_latency_avg > playback_high:
             qoe_unhealthy.add("playback_latency_high")
-        elif avg_playback_latency_avg < self.avg_playback_latency_threshold_low:
+        elif avg_playback_latency_avg < playback_low:
             qoe_unhealthy.add("playback_latency_low")
 
-        if avg_download_time_avg > self.avg_download_time_threshold_high:
+        if avg_download_time_avg > download_high:
             qoe_unhealthy.add("download_time_high")
-        elif avg_download_time_avg < self.avg_download_time_threshold_low:
+        elif avg_download_time_avg < download_low:
             qoe_unhealthy.add("download_time_low")
 
-        if cache_hit_ratio_avg < self.cache_hit_ratio_threshold_low:
+        if cache_hit_ratio_avg < cache_hit_low:
             qoe_unhealthy.add("cache_hit_low")
 
-        if disk_usage_avg > self.disk_usage_threshold:
+        if disk_usage_avg > disk_usage_thr:
             qoe_unhealthy.add("disk_usage_high")
 
         if "no_replicas" in qos_unhealthy:
@@ -163,59 +239,69 @@ class Analyzer:
 
         return result
 
-    def _create_dataframe(self, data):
-        return pd.DataFrame([{
-            "timestamp": e['t'], "service": e['d'][0], "value": e['d'][1]
-        } for e in data["data"]])
+    def _average_by_service(self, data):
+        # mean value per service (indexed like self.services) and the number of samples behind it
+        entries = data["data"]
+        n_svc = len(self.services)
+        # split (service, value) columns in one pass, numpy turns missing values (None) into NaN
+        services, values = zip(*((e['d'][0], e['d'][1]) for e in entries))
+        # service filter: the prebuilt service -> row dict, with -1 for services we don't track
+        svc_idx = np.fromiter(map(self._svc_to_idx.get, services, repeat(-1)), dtype=np.int32, count=len(services))
+        values = np.array(values, dtype=np.float64)
+        mask = (svc_idx >= 0) & ~np.isnan(values)
+        sums = np.bincount(svc_idx[mask], weights=values[mask], minlength=n_svc)
+        counts = np.bincount(svc_idx[mask], minlength=n_svc)
+        return sums / np.maximum(counts, 1), counts
+
+    def begin_cycle(self):
+        # services without samples get 0
+        self._matrix.fill(0)
+
+    def aggregate(self, metric_id, aggregation, data):
+        # fold one fetched metric into the current cycle, so it can run while other fetches are in flight
+        j = self._metric_cols.get((metric_id, aggregation))
+        if j is None:
+            return
+        # nothing reported for this metric (e.g. no traffic yet): its column just stays 0
+        if not data.get("data"):
+            return
+        try:
+            avg_values, counts = self._average_by_service(data)
+            self._matrix[:, j] = avg_values
+        except (KeyError, TypeError, ValueError, IndexError) as e:
+            log.warning("Skipping malformed data for %s (%s): %s", metric_id, aggregation, e)
 
     def process_data(self, qos_data, qoe_data):
-        outputs = {svc: {} for svc in self.services}
-        analysis_results = {}   
-        for (metric_id, aggregation) in self.metrics:
+        self.begin_cycle()
+        for metric_id, aggregation in self.metrics:
             data = qos_data.get((metric_id, aggregation))
             if data is None:
-                print(f"No data for metric {metric_id} with aggregation {aggregation}")
+                log.warning("No data for metric %s with aggregation %s", metric_id, aggregation)
                 continue
-            try:
-                df = self._create_dataframe(data)
-                df_filtered = df[df['service'].isin(self.services)]
-                avg_values = df_filtered.groupby('service')['value'].mean()
-
-                metric_name = f"{metric_id}_{aggregation}"
-
-                for svc, val in avg_values.items():
-                    outputs[svc][metric_name] = val
-            except:
-                print("Don't have data now. Please first request the server by test.js")
-
-        for svc, metric_values in outputs.items():
-            print(f"Service: {svc}")
+            self.aggregate(metric_id, aggregation, data)
+        return self.analyze(qoe_data)
+
+    def analyze(self, qoe_data):
+        analysis_results = {}
+        # columns ordered like FIELDS
+        for svc, row in zip(self.services, self._matrix[:, self._field_cols]):
+            log.info("Service: %s", svc)
             ## QoS metrcis
-            # Latency
-            latency_avg = metric_values.get("net.request.time.in_avg", 0)
-            latency_max = metric_values.get("net.request.time.in_max", 0)
+            (latency_avg, latency_max, request_count, request_byte_total,
+             errors, cpu, memory, available_replicas) = row
             # Traffic
-            request_count = metric_values.get("net.request.count.in_sum", 0)
-            request_per_second = metric_values.get("net.request.count.in_sum", 0) / 10
-            request_byte_total = metric_values.get("net.bytes.total_sum", 0)
+            request_per_second = request_count / 10
             # Errors
-            errors = metric_values.get("net.http.error.count_sum", 0)
             error_rate = errors / request_count if request_count else 0
-            # Saturation
-            cpu = metric_values.get("cpu.quota.used.percent_avg", 0)
-            memory = metric_values.get("memory.limit.used.percent_avg", 0)
-            # Other
-            available_replicas = metric_values.get("kubernetes.deployment.replicas.available_max", 0)
 
             ## QoE metrics
-            cache_hit_ratio = None
-            disk_usage = qoe_data["disk_usage"]
-            avg_playback_latency = qoe_data["avg_playback_latency"] 
-            avg_download_time = qoe_data["avg_download_time"]
-            if qoe_data["cache_hit_ratio"][0] or qoe_data["cache_hit_ratio"][1] == 0:
-                cache_hit_ratio = 0
-            else:
-                cache_hit_ratio = (qoe_data["cache_hit_ratio"][0] / (qoe_data["cache_hit_ratio"][0] + qoe_data["cache_hit_ratio"][1])) * 100
+            # empty when the CarTunes request failed
+            disk_usage = qoe_data.get("disk_usage", 0)
+            avg_playback_latency = qoe_data.get("avg_playback_latency", 0)
+            avg_download_time = qoe_data.get("avg_download_time", 0)
+            hits, misses = qoe_data.get("cache_hit_ratio", (0, 0))
+            # no lookups yet (zero total) counts as no data
+            cache_hit_ratio = hits / (hits + misses) * 100 if hits + misses else 0
 
             result = self._evaluate_metrics(svc, cpu, memory, latency_avg, latency_max, request_count, request_per_second, 
                                             request_byte_total, error_rate, available_replicas, disk_usage, cache_hit_ratio,
@@ -1,146 +1,167 @@
 import subprocess
 import os
+import sys
 import datetime
+import logging
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from mapek.OcClient import OcClient
+
+log = logging.getLogger("mapek.executor")
+
+# deployment.sh lives in the repository root and builds from paths relative to it
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 class Executor:
     def __init__(self):
-        pass
+        self.oc = OcClient()
+
+    def _run(self, *steps):
+        # chain OcClient calls like "&&": stop at the first failure, keep the output of every step run
+        stdout = ""
+        for step in steps:
+            res = step()
+            stdout += res.stdout
+            if res.returncode != 0:
+                break
+        res.stdout = stdout
+        return res
+
+    def _dry_run(self, svcs):
+        # verify every service with a single lookup, returns the first one that failed (None if all passed)
+        found, stderr = self.oc.find_deployments(svcs)
+        failed = None
+        for svc in svcs:
+            if svc in found:
+                log.info("[DRY-RUN][OK] %s can be safely updated.", svc)
+            else:
+                log.error("[DRY-RUN][ERROR] %s verification failed:\n%s", svc, stderr)
+                if failed is None:
+                    failed = svc
+        return failed
 
-    def _run(self, command):
+    # hard self-heal function
+    def _hard_self_heal(self, svc):
+        log.info("[HARD SELF-HEAL] Running full redeployment script for %s...", svc)
+        # stream the (long) build/deploy output straight to our stdout instead of collecting it in memory
+        sys.stdout.flush()
         res = subprocess.run(
-            command,
-            shell=True,
-            stdout=subprocess.PIPE,
+            ["bash", os.path.join(REPO_ROOT, "deployment.sh")],
+            cwd=REPO_ROOT,
             stderr=subprocess.PIPE,
             text=True,
         )
-        return res
-
-    def _dry_run(self, svc):
-        cmd = f"oc get deploy {svc} >/dev/null 2>&1"
-        res = self._run(cmd)
         if res.returncode == 0:
-            print(f"[DRY-RUN][OK] {svc} can be safely updated.")
+            log.info("[HARD SELF-HEAL] Full redeployment succeeded.")
             return True
         else:
-            print(f"[DRY-RUN][ERROR] {svc} verification failed:\n{res.stderr}")
+            log.error("[HARD SELF-HEAL][ERROR] Redeployment failed:")
+            log.error(res.stderr)
             return False
 
-    # hard self-heal function
-    def _hard_self_heal(self, svc):
-        print(f"[HARD SELF-HEAL] Running full redeployment script for {svc}...")
-        command = "bash deployment.sh"
-        res = self._run(command)
-        print(res.stdout)
-        if res.returncode == 0:
-            print("[HARD SELF-HEAL] Full redeployment succeeded.")
+    def execute_qos_plan(self, plan, configs, system_situations):
+        # steady state: nothing to adapt, skip the whole transaction
+        todo = {svc: adaptation for svc, adaptation in plan.items() if adaptation}
+        if not todo:
+            log.info("[TRANSACTION][NOOP] No adaptation needed.")
             return True
-        else:
-            print("[HARD SELF-HEAL][ERROR] Redeployment failed:")
-            print(res.stderr)
-            return False
 
-    def execute_qos_plan(self, plan, configs, system_situations):
-        print("======== Starting Atomic Adaptation Transaction ========")
-
-        print("\n[STEP 1] Dry-run verification for all services...")
-        for svc, adaptation in plan.items():
-            if not adaptation:
-                continue
-            if not self._dry_run(svc):
-                print(f"[ABORT] {svc} verification failed. Triggering HARD SELF-HEAL.")
-                return self._hard_self_heal(svc)
+        log.info("======== Starting Atomic Adaptation Transaction ========")
 
-        print("\n[STEP 2] Apply changes...")
-        for svc, adaptation in plan.items():
-            if not adaptation:
-                continue
+        # Level 2: HARD SELF-HEAL – full reset with deployment.sh, redeploys everything so it replaces
+        # the other steps, and there is nothing for a dry-run to verify
+        for svc in todo:
+            if system_situations[svc] == "self_heal_hard":
+                log.info("Executing adaptation for %s...", svc)
+                return self._hard_self_heal(svc)
 
-            mode = system_situations[svc]
-            print(f"Executing adaptation for {svc}...")
+        log.info("\n[STEP 1] Dry-run verification for all services...")
+        failed = self._dry_run(list(todo))
+        if failed is not None:
+            log.warning("[ABORT] %s verification failed. Triggering HARD SELF-HEAL.", failed)
+            return self._hard_self_heal(failed)
+
+        log.info("\n[STEP 2] Apply changes...")
+        # one timestamp for the whole transaction, so every restart it triggers carries the same marker
+        tx_ts = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        # services are separate deployments, apply them concurrently
+        with ThreadPoolExecutor(max_workers=min(8, len(todo))) as pool:
+            futures = {
+                pool.submit(self._apply_one, svc, adaptation, system_situations[svc], configs, tx_ts): svc
+                for svc, adaptation in todo.items()
+            }
+            failed = None
+            for future in as_completed(futures):
+                if not future.result():
+                    failed = futures[future]
+                    for pending in futures:
+                        pending.cancel()
+                    break
+        # leaving the pool waits for in-flight applies, so the redeploy doesn't race them
+        if failed is not None:
+            return self._hard_self_heal(failed)
+
+        log.info("\n[STEP 3] All services successfully updated.")
+        log.info("[TRANSACTION][SUCCESS] Atomic adaptation completed.")
+        return True
 
-            # Level 2: HARD SELF-HEAL – full reset with deployment.sh
-            if mode == "self_heal_hard":
-                return self._hard_self_heal(svc)
+    def _apply_one(self, svc, adaptation, mode, configs, tx_ts):
+        # apply one service's adaptation, returns False when it has to fall back to HARD SELF-HEAL
+        log.info("Executing adaptation for %s...", svc)
+
+        # Level 1: SOFT SELF-HEAL – restart and ensure replicas
+        if mode == "self_heal_soft":
+            replica = max(adaptation.get("replica", 1), 1)
+            res = self._run(
+                lambda: self.oc.restart(svc, tx_ts),
+                lambda: self.oc.scale(svc, replica)
+            )
+            if res.returncode == 0:
+                log.info("[SELF-HEAL SOFT] %s restarted and scaled to %s replicas.", svc, replica)
+                log.info(res.stdout)
+            else:
+                log.error("[SELF-HEAL SOFT][ERROR] %s failed:\n%s", svc, res.stderr)
+                log.warning("[SELF-HEAL SOFT] Falling back to HARD SELF-HEAL.")
+                return False
+
+        # self-optimization: new resources (and replicas) in one patch
+        elif mode in ("warning", "unhealthy"):
+            new_requests, new_limits, replica, changes = self._plan_patch(mode, svc, adaptation, configs)
+            res = self.oc.update(svc, replica, requests=new_requests, limits=new_limits)
+            if res.returncode == 0:
+                for change in changes:
+                    log.info(*change)
+                log.info(res.stdout)
+            else:
+                log.error("%s: Adaptation failed with error:", svc)
+                log.error(res.stderr)
+                log.warning("[%s] Falling back to HARD SELF-HEAL.", mode.upper())
+                return False
 
-            # Level 1: SOFT SELF-HEAL – restart and ensure replicas
-            elif mode == "self_heal_soft":
-                replica = max(adaptation.get("replica", 1), 1)
-                command = (
-                    f"oc rollout restart deployment/{svc} && "
-                    f"oc scale deployment/{svc} --replicas={replica}"
-                )
-                res = self._run(command)
-                if res.returncode == 0:
-                    print(f"[SELF-HEAL SOFT] {svc} restarted and scaled to {replica} replicas.")
-                    print(res.stdout)
-                else:
-                    print(f"[SELF-HEAL SOFT][ERROR] {svc} failed:\n{res.stderr}")
-                    print("[SELF-HEAL SOFT] Falling back to HARD SELF-HEAL.")
-                    return self._hard_self_heal(svc)
-
-            elif mode == "warning":
-                cpu_limits = adaptation["limits"]["cpu"]
-                memory_limits = adaptation["limits"]["memory"]
-                replica = adaptation["replica"]
-                command = (
-                    f"oc set resources deployment/{svc} "
-                    f"--limits=cpu={cpu_limits}m,memory={memory_limits}Mi && "
-                    f"oc scale deployment/{svc} --replicas={replica}"
-                )
-
-                res = self._run(command)
-                if res.returncode == 0:
-                    if cpu_limits != configs[svc]["limits"]["cpu"]:
-                        print(f"CPU is changed from {configs[svc]['limits']['cpu']} to {cpu_limits} for {svc}")
-                    if memory_limits != configs[svc]["limits"]["memory"]:
-                        print(f"Memory is changed from {configs[svc]['limits']['memory']} to {memory_limits} for {svc}")
-                    if replica != configs[svc]["replica"]:
-                        print(f"Replica is changed from {configs[svc]['replica']} to {replica} for {svc}")
-                    print(res.stdout)
-                else:
-                    print(f"{svc}: Adaptation failed with error:")
-                    print(res.stderr)
-                    print("[WARNING] Falling back to HARD SELF-HEAL.")
-                    return self._hard_self_heal(svc)
-
-            elif mode == "unhealthy":
-                cpu_requests = adaptation["requests"]["cpu"]
-                cpu_limits = adaptation["limits"]["cpu"]
-                memory_requests = adaptation["requests"]["memory"]
-                memory_limits = adaptation["limits"]["memory"]
-                replica = adaptation["replica"]
-                command = (
-                    f"oc set resources deployment/{svc} "
-                    f"--requests=cpu={cpu_requests}m,memory={memory_requests}Mi "
-                    f"--limits=cpu={cpu_limits}m,memory={memory_limits}Mi && "
-                    f"oc scale deployment/{svc} --replicas={replica}"
-                )
-
-                res = self._run(command)
-                if res.returncode == 0:
-                    if cpu_limits != configs[svc]["limits"]["cpu"]:
-                        print(f"CPU is changed from {configs[svc]['limits']['cpu']} to {cpu_limits} for {svc}")
-                    if cpu_requests != configs[svc]["requests"]["cpu"]:
-                        print(f"CPU is changed from {configs[svc]['requests']['cpu']} to {cpu_requests} for {svc}")
-                    if memory_limits != configs[svc]["limits"]["memory"]:
-                        print(f"Memory is changed from {configs[svc]['limits']['memory']} to {memory_limits} for {svc}")
-                    if memory_requests != configs[svc]["requests"]["memory"]:
-                        print(f"Memory is changed from {configs[svc]['requests']['memory']} to {memory_requests} for {svc}")
-                    if replica != configs[svc]["replica"]:
-                        print(f"Replica is changed from {configs[svc]['replica']} to {replica} for {svc}")
-                    print(res.stdout)
-                else:
-                    print(f"{svc}: Adaptation failed with error:")
-                    print(res.stderr)
-                    print("[UNHEALTHY] Falling back to HARD SELF-HEAL.")
-                    return self._hard_self_heal(svc)
-
-        print("\n[STEP 3] All services successfully updated.")
-        print("[TRANSACTION][SUCCESS] Atomic adaptation completed.")
         return True
-    
+
+    def _plan_patch(self, mode, svc, adaptation, configs):
+        # what to send for the mode (warning only touches limits), plus the change messages (format, args) to log once applied
+        old = configs[svc]
+        old_limits, old_requests, old_replica = old["limits"], old["requests"], old["replica"]
+        new_requests = adaptation["requests"] if mode == "unhealthy" else None
+        new_limits = adaptation["limits"]
+        replica = adaptation["replica"]
+
+        changes = []
+        if new_limits["cpu"] != old_limits["cpu"]:
+            changes.append(("CPU is changed from %s to %s for %s", old_limits['cpu'], new_limits['cpu'], svc))
+        if new_requests and new_requests["cpu"] != old_requests["cpu"]:
+            changes.append(("CPU is changed from %s to %s for %s", old_requests['cpu'], new_requests['cpu'], svc))
+        if new_limits["memory"] != old_limits["memory"]:
+            changes.append(("Memory is changed from %s to %s for %s", old_limits['memory'], new_limits['memory'], svc))
+        if new_requests and new_requests["memory"] != old_requests["memory"]:
+            changes.append(("Memory is changed from %s to %s for %s", old_requests['memory'], new_requests['memory'], svc))
+        if replica != old_replica:
+            changes.append(("Replica is changed from %s to %s for %s", old_replica, replica, svc))
+        return new_requests, new_limits, replica, changes
+
     def execute_qoe_plan(self, plan, configs, system_situations):
         song_quality = configs["song_quality"]
         preload_song = configs["preload_song"]
@@ -155,7 +176,7 @@ class Executor:
         }
 
         res = requests.post(f"{base_url}/api/config/update", params=params)
-        print(res.json())
+        log.info(res.json())
 
         return True
 
@@ -1,24 +1,57 @@
 import json
 import os
+import time
+import logging
+
+# orjson is much faster at parsing/serializing, fall back to the stdlib when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+log = logging.getLogger("mapek.knowledge")
 
 class Knowledge:
 
     def __init__(self, file_path = "./knowledge.json"):
         self.file_path = file_path
         self.data = self._load_json()
-        self.last_modified = os.path.getmtime(file_path)
+        # nanosecond mtime, so sub-second edits aren't missed
+        self.last_modified_ns = os.stat(file_path).st_mtime_ns
+        self._last_check = time.monotonic()
+        # setters only mark the data dirty, flush() writes it once per cycle
+        self._dirty = False
 
     def _load_json(self):
-        if not os.path.exists(self.file_path):
-            print(f"{self.file_path} not found. Creating an empty knowledge base.")
+        # just open it, a missing file shows up as FileNotFoundError without an extra exists() stat
+        try:
+            if orjson is not None:
+                with open(self.file_path, "rb") as f:
+                    return orjson.loads(f.read())
+            with open(self.file_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            log.warning("%s not found. Creating an empty knowledge base.", self.file_path)
             return None
-        with open(self.file_path, "r") as f:
-            return json.load(f)
     
     def _save_json(self):
-        with open(self.file_path, "w") as f:
-            json.dump(self.data, f, indent=2)
-        print(f"Knowledge file updated: {self.file_path}")
+        # write a temp file and swap it in, so readers never see a half-written knowledge base
+        tmp_path = self.file_path + ".tmp"
+        if orjson is not None:
+            with open(tmp_path, "wb") as f:
+                f.write(orjson.dumps(self.data, option=orjson.OPT_INDENT_2))
+        else:
+            # same bytes as orjson: UTF-8 text, non-ASCII left unescaped
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.file_path)
+        self.last_modified_ns = os.stat(self.file_path).st_mtime_ns
+        log.info("Knowledge file updated: %s", self.file_path)
+
+    def flush(self):
+        if self._dirty:
+            self._save_json()
+            self._dirty = False
 
     def get(self):
         return {
@@ -47,22 +80,30 @@ class Knowledge:
             self.data["thresholds"][metric] = value
         else:
             self.data["thresholds"][metric][key] = value
-        self._save_json()
+        self._dirty = True
 
     def set_weight(self, metric, value):
         if "weights" not in self.data:
             self.data["weights"] = {}
         self.data["weights"][metric] = value
-        self._save_json()
+        self._dirty = True
 
     def set_resource_config(self, service_name, resource_data):
         if "resources" not in self.data:
             self.data["resources"] = {}
         self.data["resources"][service_name] = resource_data
-        self._save_json()
+        self._dirty = True
 
     def reload_if_updated(self):
-        modified = os.path.getmtime(self.file_path)
-        if modified != self.last_modified:
+        # unsaved changes win over the file on disk
+        if self._dirty:
+            return
+        # checked very recently, skip the stat
+        now = time.monotonic()
+        if now - self._last_check < 0.5:
+            return
+        self._last_check = now
+        modified_ns = os.stat(self.file_path).st_mtime_ns
+        if modified_ns != self.last_modified_ns:
             self.data = self._load_json()
-            self.last_modified = modified
\ No newline at end of file
+            self.last_modified_ns = modified_ns
\ No newline at end of file
@@ -1,23 +1,55 @@
 import os
 import json
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from sdcclient import IbmAuthHelper, SdMonitorClient
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# orjson encodes the raw responses much faster, fall back to the stdlib when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+log = logging.getLogger("mapek.monitor")
 
 class Monitor:
     def __init__(self, url, api_key, guid, sleep):
         ibm_headers = IbmAuthHelper.get_headers(url, api_key, guid)
         self.sdclient = SdMonitorClient(sdc_url=url, custom_headers=ibm_headers)
+        # the client's session keeps at most 10 connections, fewer than the concurrent metric fetches,
+        # so widen the pool (keeping its retry policy) instead of re-handshaking TLS for the overflow
+        retries = self.sdclient.http.get_adapter(url).max_retries
+        self.sdclient.http.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retries))
         self.START = -sleep
         self.END = 0
         self.SAMPLING = 10
         self.FILTER = 'kube_namespace_name="acmeair-group6"'
+        self.DEPLOYMENT_SPEC = {"id": "kubernetes.deployment.name"}  # segmentation by deployment
+        # (metric id, aggregation) -> metric spec sent to Sysdig, built once per pair (the client only serializes it)
+        self.metric_specs = {}
+        # keep-alive session for the app's metrics endpoint, polled every cycle
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=Retry(total=2, backoff_factor=0.1))
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+        self.RAW_DIR = 'datasets/raw'
+        os.makedirs(self.RAW_DIR, exist_ok=True)
+        # metric queries are independent network calls, run them concurrently (sized like the HTTPS pool)
+        self.fetch_pool = ThreadPoolExecutor(max_workers=16)
+        # raw responses are saved in the background, so fetches don't wait on disk
+        self.raw_writer = ThreadPoolExecutor(max_workers=1)
+        # (metric id, aggregation) -> raw JSON path, the pairs are fixed so each name is built once
+        self.raw_paths = {}
 
     def fetch_data_from_ibm(self, id, aggregation):
-        metric = [
-            {"id": "kubernetes.deployment.name"},  # segmentation by deployment
-            {"id": id, "aggregations": {"time": aggregation, "group": "avg"}}
-        ]
+        metric = self.metric_specs.get((id, aggregation))
+        if metric is None:
+            metric = [self.DEPLOYMENT_SPEC, {"id": id, "aggregations": {"time": aggregation, "group": "avg"}}]
+            self.metric_specs[(id, aggregation)] = metric
         try:
             ok, res = self.sdclient.get_data(
                 metrics=metric, 
@@ -27,38 +59,61 @@ class Monitor:
                 filter=self.FILTER
             )
             if not ok:
-                print(f"Error fetching {id}: {res}")
+                log.error("Error fetching %s: %s", id, res)
                 return None
             # Save raw JSON
-            if not os.path.exists('datasets/raw'):
-                os.makedirs('datasets/raw')
-            filename = "datasets/raw/" + id.replace(".", "_") + "_" + aggregation + "_metric.json"
-            with open(filename, "w") as outfile:
-                json.dump(res, outfile)
+            filename = self.raw_paths.get((id, aggregation))
+            if filename is None:
+                filename = self.RAW_DIR + "/" + id.replace(".", "_") + "_" + aggregation + "_metric.json"
+                self.raw_paths[(id, aggregation)] = filename
+            self.raw_writer.submit(self._save_raw, filename, res)
             return res
         except Exception as e:
-            print(f"Exception occurred while fetching {id}: {e}")
+            log.error("Exception occurred while fetching %s: %s", id, e)
             return None
         
+    def fetch_many(self, specs):
+        # yields ((id, aggregation), result) for each spec as soon as its fetch completes
+        futures = {self.fetch_pool.submit(self.fetch_data_from_ibm, id, aggregation): (id, aggregation)
+                   for id, aggregation in specs}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+    def _save_raw(self, filename, res):
+        try:
+            if orjson is not None:
+                with open(filename, "wb") as outfile:
+                    outfile.write(orjson.dumps(res))
+            else:
+                # same bytes as orjson: compact separators, UTF-8 text, non-ASCII left unescaped
+                with open(filename, "w", encoding="utf-8") as outfile:
+                    json.dump(res, outfile, ensure_ascii=False, separators=(",", ":"))
+        except Exception as e:
+            log.error("Exception occurred while saving %s: %s", filename, e)
+
     def fetch_data_from_cartunes(self):
         base_url = "http://cartunes-app-acmeair-group6.mycluster-ca-tor-1-835845-04e8c71ff333c8969bc4cbc5a77a70f6-0000.ca-tor.containers.appdomain.cloud"
         url = base_url + "/api/metrics"
         try:
-            response = requests.get(url, timeout=5)
+            response = self.http.get(url, timeout=5)
             response.raise_for_status()  # 若狀態碼不是 200 會丟錯誤
             data = response.json()
-            cache_usage = 0
-            cache_hit_ratio = 0
-            if data.get('disk_usage') != None:
-                cache_usage = data.get('cache_usage')
-            if data.get('cache_hit_ratio')[0] != 0 and data.get('cache_hit_ratio')[1] != 0:
-                cache_hit_ratio = data.get('cache_hit_ratio')[0] / (data.get('cache_hit_ratio')[0] + data.get('cache_hit_ratio')[1])
-            print("Application Metrics:")
-            print(f"  cache_usage         : {data.get('disk_usage')}%")
-            print(f"  cache_hit_ratio     : {cache_hit_ratio * 100}%")
-            print(f"  avg_playback_latency: {data.get('avg_playback_latency')}s")
-            print(f"  avg_download_time   : {data.get('avg_download_time')}s")
-            return data
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Request failed: {e}")
-            return None
+        except (requests.exceptions.RequestException, ValueError) as e:
+            log.error("❌ Request failed: %s", e)
+            return {}
+        # the app reports its cache usage as "disk_usage" and cache_hit_ratio as [hits, misses];
+        # hand the Analyzer every key it reads, with zeros for whatever the payload left out
+        hits, misses = data.get('cache_hit_ratio') or (0, 0)
+        metrics = {
+            "disk_usage": data.get('disk_usage') or 0,
+            "cache_hit_ratio": (hits, misses),
+            "avg_playback_latency": data.get('avg_playback_latency') or 0,
+            "avg_download_time": data.get('avg_download_time') or 0,
+        }
+        cache_hit_ratio = hits / (hits + misses) if hits + misses else 0.0
+        log.info("Application Metrics:")
+        log.info("  cache_usage         : %s%%", metrics["disk_usage"])
+        log.info("  cache_hit_ratio     : %s%%", cache_hit_ratio * 100)
+        log.info("  avg_playback_latency: %ss", metrics["avg_playback_latency"])
+        log.info("  avg_download_time   : %ss", metrics["avg_download_time"])
+        return metrics
@@ -0,0 +1,111 @@
+import subprocess
+import logging
+
+try:
+    from kubernetes import client, config
+except ImportError:
+    client = None
+
+log = logging.getLogger("mapek.oc")
+
+class OcClient:
+    # talks to the cluster in-process through the kubernetes client (using the kubeconfig written by "oc login"),
+    # falls back to spawning oc when the client or the kubeconfig is not available
+    def __init__(self):
+        self.apps = None
+        self.namespace = None
+        # deployment -> container names, they don't change between adaptations so read them once
+        self.containers = {}
+        if client is None:
+            log.warning("[OC] kubernetes client not installed, falling back to oc subprocesses.")
+            return
+        try:
+            config.load_kube_config()
+            _, active = config.list_kube_config_contexts()
+            self.namespace = active["context"].get("namespace", "default")
+            self.apps = client.AppsV1Api()
+        except Exception as e:
+            log.warning("[OC] Could not load kubeconfig (%s), falling back to oc subprocesses.", e)
+
+    def _oc(self, *args):
+        return subprocess.run(
+            ["oc", *args],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+
+    def _call(self, args, func, stdout):
+        # run an API call and report it like the matching oc command would
+        try:
+            func()
+        except Exception as e:
+            return subprocess.CompletedProcess(args, 1, "", f"{e}\n")
+        return subprocess.CompletedProcess(args, 0, stdout, "")
+
+    def find_deployments(self, svcs):
+        # look all services up in one call, returns the names that exist and any error output
+        if self.apps is None:
+            res = self._oc("get", "deploy", *svcs, "-o", "name")
+            found = {line.rpartition("/")[2] for line in res.stdout.split()}
+            return found, res.stderr
+        try:
+            deployments = self.apps.list_namespaced_deployment(self.namespace)
+        except Exception as e:
+            return set(), f"{e}\n"
+        return {d.metadata.name for d in deployments.items}.intersection(svcs), ""
+
+    def restart(self, svc, restarted_at):
+        # restarted_at: ISO timestamp of the adaptation transaction
+        args = ["oc", "rollout", "restart", f"deployment/{svc}"]
+        if self.apps is None:
+            return self._oc(*args[1:])
+        # same annotation "oc rollout restart" sets to roll the pods
+        body = {"spec": {"template": {"metadata": {"annotations": {
+            "kubectl.kubernetes.io/restartedAt": restarted_at
+        }}}}}
+        return self._call(args, lambda: self.apps.patch_namespaced_deployment(svc, self.namespace, body),
+                          f"deployment.apps/{svc} restarted\n")
+
+    def scale(self, svc, replica):
+        args = ["oc", "scale", f"deployment/{svc}", f"--replicas={replica}"]
+        if self.apps is None:
+            return self._oc(*args[1:])
+        body = {"spec": {"replicas": replica}}
+        return self._call(args, lambda: self.apps.patch_namespaced_deployment_scale(svc, self.namespace, body),
+                          f"deployment.apps/{svc} scaled\n")
+
+    def _container_names(self, svc):
+        names = self.containers.get(svc)
+        if names is None:
+            deployment = self.apps.read_namespaced_deployment(svc, self.namespace)
+            names = [c.name for c in deployment.spec.template.spec.containers]
+            self.containers[svc] = names
+        return names
+
+    def update(self, svc, replica, requests=None, limits=None):
+        # new resources and replica count for a deployment, requests/limits are {"cpu": millicores, "memory": MiB}
+        args = ["oc", "set", "resources", f"deployment/{svc}"]
+        resources = {}
+        if requests:
+            args.append(f"--requests=cpu={requests['cpu']}m,memory={requests['memory']}Mi")
+            resources["requests"] = {"cpu": f"{requests['cpu']}m", "memory": f"{requests['memory']}Mi"}
+        if limits:
+            args.append(f"--limits=cpu={limits['cpu']}m,memory={limits['memory']}Mi")
+            resources["limits"] = {"cpu": f"{limits['cpu']}m", "memory": f"{limits['memory']}Mi"}
+        if self.apps is None:
+            res = self._oc(*args[1:])
+            if res.returncode == 0:
+                scaled = self.scale(svc, replica)
+                scaled.stdout = res.stdout + scaled.stdout
+                res = scaled
+            return res
+
+        def patch():
+            # one PATCH carrying both, so the apiserver applies them together (no separate scale call);
+            # like "oc set resources", every container of the deployment gets the new resources
+            containers = [{"name": name, "resources": resources} for name in self._container_names(svc)]
+            body = {"spec": {"replicas": replica, "template": {"spec": {"containers": containers}}}}
+            self.apps.patch_namespaced_deployment(svc, self.namespace, body)
+
+        return self._call(["oc", "patch", f"deployment/{svc}"], patch, f"deployment.apps/{svc} patched\n")
@@ -1,4 +1,76 @@
-import copy
+from dataclasses import dataclass
+
+import numpy as np
+
+# CPU steps (millicores) tried around the planned config before picking the best ROI
+CPU_DELTAS = np.array((-250, 0, 250))
+
+# one bit per QoS unhealthy metric, so the combined conditions below are single mask tests
+CPU_HIGH, CPU_LOW, MEMORY_HIGH, MEMORY_LOW, LATENCY_AVG_HIGH, ERROR_RATE_HIGH = (1 << i for i in range(6))
+QOS_METRIC_FLAGS = {
+    "cpu_high": CPU_HIGH,
+    "cpu_low": CPU_LOW,
+    "memory_high": MEMORY_HIGH,
+    "memory_low": MEMORY_LOW,
+    "latency_avg_high": LATENCY_AVG_HIGH,
+    "error_rate_high": ERROR_RATE_HIGH,
+}
+CPU_AND_LATENCY_HIGH = CPU_HIGH | LATENCY_AVG_HIGH
+CPU_AND_MEMORY_LOW = CPU_LOW | MEMORY_LOW
+CPU_OR_MEMORY_HIGH = CPU_HIGH | MEMORY_HIGH
+LATENCY_OR_ERRORS_HIGH = LATENCY_AVG_HIGH | ERROR_RATE_HIGH
+
+# QoE conditions that need several unhealthy metrics at once, tested with a single subset check
+PLAYBACK_AND_DOWNLOAD_HIGH = frozenset(("playback_latency_high", "download_time_high"))
+PLAYBACK_AND_DOWNLOAD_LOW = frozenset(("playback_latency_low", "download_time_low"))
+DOWNLOAD_HIGH_CACHE_LOW = frozenset(("download_time_high", "cache_hit_low"))
+
+def qos_metric_mask(unhealthy_metrics):
+    mask = 0
+    for metric in unhealthy_metrics:
+        mask |= QOS_METRIC_FLAGS.get(metric, 0)
+    return mask
+
+@dataclass(slots=True)
+class Config:
+    # flat view of a service config while planning, the rest of the loop keeps using the dict form
+    req_cpu: float
+    lim_cpu: float
+    req_mem: float
+    lim_mem: float
+    replica: int
+    song_quality: int
+    cache_size: int
+    preload_song: int
+
+    @staticmethod
+    def key(config):
+        # the config dict as a hashable tuple, in field order
+        requests, limits = config["requests"], config["limits"]
+        return (requests["cpu"], limits["cpu"], requests["memory"], limits["memory"], config["replica"],
+                config["song_quality"], config["cache_size"], config["preload_song"])
+
+    # means of request and limit, what the ROI is computed on
+    def avg_cpu(self):
+        return (self.req_cpu + self.lim_cpu) * 0.5
+
+    def avg_mem(self):
+        return (self.req_mem + self.lim_mem) * 0.5
+
+    def to_dict(self):
+        return {
+            "requests": {"cpu": self.req_cpu, "memory": self.req_mem},
+            "limits": {"cpu": self.lim_cpu, "memory": self.lim_mem},
+            "replica": self.replica,
+            "song_quality": self.song_quality,
+            "preload_song": self.preload_song,
+            "cache_size": self.cache_size,
+        }
+
+@dataclass(slots=True)
+class Candidate:
+    cpu_after: float
+    latency_after: float
 
 class Planner:
     def __init__(self, service_to_use, resources_limitations, resources, roi):
@@ -16,11 +88,26 @@ class Planner:
             print("Warning: Unexpected behavior")
             return None, None
 
+        system_situation, new_config = self._decide(
+            svc,
+            analysis_result["adaptation"],
+            analysis_result["qos_unhealthy_metrics"],
+            analysis_result["qoe_unhealthy_metrics"],
+            analysis_result["latency_avg"],
+            analysis_result["qos_overall_utility"],
+            Config.key(config),
+        )
+        if new_config is None:
+            return None, None
+        # self-heal leaves the config as it is, and evaluate_services' new_configs already holds
+        # this very dict, so hand it back instead of copying
+        if system_situation in ("self_heal_soft", "self_heal_hard"):
+            return system_situation, config
+        return system_situation, new_config.to_dict()
+
+    def _decide(self, svc, base_adaptation, qos_unhealthy_metrics, qoe_unhealthy_metrics,
+                latency_now, qos_overall_utility, config_key):
         system_situation = ""
-        base_adaptation = analysis_result["adaptation"]
-        qos_unhealthy_metrics = analysis_result["qos_unhealthy_metrics"]
-        qoe_unhealthy_metrics = analysis_result["qoe_unhealthy_metrics"]
-        qos_overall_utility = analysis_result["qos_overall_utility"]
         qoe_fixed = False
 
         if "self_heal" in base_adaptation:
@@ -33,13 +120,19 @@ class Planner:
 
         print(f"{svc}: situation={system_situation}")
 
-        new_config = copy.deepcopy(config)
-        adaptations = []
-
         # SELF-HEAL: always act, ROI does not apply
         if system_situation in ("self_heal_soft", "self_heal_hard"):
             print(f"{svc}: triggering {system_situation}.")
-            return system_situation, copy.deepcopy(config)
+            return system_situation, Config(*config_key)
+
+        # healthy (the common case): nothing will change, so don't copy the config at all
+        if "qos_healthy" in base_adaptation and "qoe_unhealthy" not in base_adaptation:
+            print(f"{svc}: QoS healthy → no action.")
+            return None, None
+
+        old_config = Config(*config_key)
+        new_config = Config(*config_key)
+        adaptations = []
 
         if "qoe_unhealthy" in base_adaptation:
             system_situation = "qoe_unhealthy"
@@ -55,8 +148,8 @@ class Planner:
             system_situation = "qos_unhealthy"
             new_config = self._adopt_qos_unhealthy_situation(qos_unhealthy_metrics, new_config, adaptations, svc)
 
-        print("Old config:", config)
-        print("New config:", new_config)
+        print("Old config:", old_config.to_dict())
+        print("New config:", new_config.to_dict())
 
         if qoe_fixed and system_situation == "qoe_unhealthy":
             return system_situation, new_config
@@ -65,70 +158,54 @@ class Planner:
             print(f"{svc}: QoS healthy → no action.")
             return None, None
 
-        old_cpu = (config["requests"]["cpu"] + config["limits"]["cpu"]) / 2
-        cpu_now = (new_config["requests"]["cpu"] + new_config["limits"]["cpu"]) / 2
-        latency_now = analysis_result["latency_avg"]
-
-        candidates = []
-        for delta in [-250, 0, 250]:
-            new_cpu = max(self.min_cpu, min(self.max_cpu, cpu_now + delta))
-
-            cfg = copy.deepcopy(new_config)
-
-            cfg["song_quality"] = new_config["song_quality"]
-            cfg["cache_size"] = new_config["cache_size"]
-            cfg["preload_song"] = new_config["preload_song"]
-
-            cfg["limits"]["cpu"] = new_cpu
-            cfg["requests"]["cpu"] = new_cpu
-
-            latency_after = latency_now * (cpu_now / new_cpu)
-
-            candidates.append({
-                "cpu_after": new_cpu,
-                "latency_after": latency_after,
-                "config": cfg
-            })
-
-        pareto = self._pareto_frontier(candidates)
-        best = None
-        best_roi = -1
-
-        old_memory = (config["requests"]["memory"] + config["limits"]["memory"]) / 2
-        old_replica = config["replica"]
-
-        for item in pareto:
-            cfg = item["config"]
-            new_cpu = item["cpu_after"]
-            new_memory = new_config["requests"]["memory"]
-            new_replica = new_config["replica"]
-
-            cpu_cost = abs((new_cpu - old_cpu) / old_cpu) if old_cpu else 0
-            mem_cost = abs((new_memory - old_memory) / old_memory) if old_memory else 0
-            replica_cost = abs((new_replica - old_replica) / old_replica) if old_replica else 0
-            total_cost = 0.4 * cpu_cost + 0.4 * mem_cost + 0.2 * replica_cost
-
-            benefit = (cpu_now - new_cpu) / old_cpu if old_cpu else 0
-            roi = abs(benefit) / (total_cost + 1e-6)
-
-            if roi > best_roi:
-                best_roi = roi
-                best = cfg
-
-        if best is not None:
-            new_config = best
-
-        new_cpu = (new_config["requests"]["cpu"] + new_config["limits"]["cpu"]) / 2
-        new_memory = (new_config["requests"]["memory"] + new_config["limits"]["memory"]) / 2
-        new_replica = new_config["replica"]
-
-        cpu_cost = abs((new_cpu - old_cpu) / old_cpu) if old_cpu else 0
-        mem_cost = abs((new_memory - old_memory) / old_memory) if old_memory else 0
-        replica_cost = abs((new_replica - old_replica) / old_replica) if old_replica else 0
-
-        total_cost = 0.4 * cpu_cost + 0.4 * mem_cost + 0.2 * replica_cost
-        benefit = 0.5 * ((new_cpu - old_cpu) / old_cpu if old_cpu else 0) + \
-                0.5 * ((new_memory - old_memory) / old_memory if old_memory else 0)
+        old_cpu = old_config.avg_cpu()
+        old_memory = old_config.avg_mem()
+        old_replica = old_config.replica
+        cpu_now = new_config.avg_cpu()
+
+        # all candidates at once; deltas clamped to the same CPU value collapse into one candidate
+        new_cpus = np.unique(np.clip(cpu_now + CPU_DELTAS, self.min_cpu, self.max_cpu))
+
+        if new_cpus.size == 1:
+            # the CPU range only leaves one value: nothing to compare, skip the sweep and the kernel
+            new_cpu = new_cpus.item()
+        else:
+            latencies = latency_now * (cpu_now / new_cpus)
+            candidates = [
+                Candidate(cpu_after, latency_after)
+                for cpu_after, latency_after in zip(new_cpus.tolist(), latencies.tolist())
+            ]
+
+            pareto = self._pareto_frontier(candidates)
+
+            # candidates only differ in CPU: the memory/replica part of the cost is the same for all of them
+            mem_cost = abs((new_config.req_mem - old_memory) / old_memory) if old_memory else 0
+            replica_cost = abs((new_config.replica - old_replica) / old_replica) if old_replica else 0
+            fixed_cost = 0.4 * mem_cost + 0.2 * replica_cost
+
+            # ROI of every frontier candidate at once; argmax keeps the first best, like a strict ">" scan
+            pareto_cpus = np.array([item.cpu_after for item in pareto])
+            if old_cpu:
+                cpu_cost = np.abs((pareto_cpus - old_cpu) / old_cpu)
+                benefit = (cpu_now - pareto_cpus) / old_cpu
+            else:
+                cpu_cost = benefit = np.zeros_like(pareto_cpus)
+            rois = np.abs(benefit) / (0.4 * cpu_cost + fixed_cost + 1e-6)
+            new_cpu = pareto[int(np.argmax(rois))].cpu_after
+
+        # the chosen CPU goes to request and limit alike, so it is also the new mean
+        new_config.lim_cpu = new_cpu
+        new_config.req_cpu = new_cpu
+        new_memory = new_config.avg_mem()
+        new_replica = new_config.replica
+
+        # relative changes, computed once: the cost uses their size, the benefit their sign
+        d_cpu = (new_cpu - old_cpu) / old_cpu if old_cpu else 0.0
+        d_memory = (new_memory - old_memory) / old_memory if old_memory else 0.0
+        d_replica = (new_replica - old_replica) / old_replica if old_replica else 0.0
+
+        total_cost = 0.4 * abs(d_cpu) + 0.4 * abs(d_memory) + 0.2 * abs(d_replica)
+        benefit = 0.5 * d_cpu + 0.5 * d_memory
         predicted_utility = min(1.0, qos_overall_utility + benefit)
 
         roi = abs(benefit) / (total_cost + 1e-6)
@@ -158,122 +235,123 @@ class Planner:
         return decisions, new_configs, system_situations
 
     def _adopt_qos_warning_situation(self, unhealthy_metrics, new_config, adaptations, svc):
+        mask = qos_metric_mask(unhealthy_metrics)
+
         ## Vertical Scale Up & Scale Down
         # situation of increasing cpu
-        if "cpu_high" in unhealthy_metrics and "latency_avg_high" in unhealthy_metrics:
-            new_config["limits"]["cpu"] = min(new_config["limits"]["cpu"] + 250, self.max_cpu)
+        if mask & CPU_AND_LATENCY_HIGH == CPU_AND_LATENCY_HIGH:
+            new_config.lim_cpu = min(new_config.lim_cpu + 250, self.max_cpu)
             adaptations.append("increase_cpu")
 
         # situation of increasing memory
-        if "memory_high" in unhealthy_metrics:
-            new_config["limits"]["memory"] = min(new_config["limits"]["memory"] + 256, self.max_memory)
+        if mask & MEMORY_HIGH:
+            new_config.lim_mem = min(new_config.lim_mem + 256, self.max_memory)
             adaptations.append("increase_memory")
 
         # situation of decreasing CPU
-        if "cpu_low" in unhealthy_metrics:
-            new_config["limits"]["cpu"] = max(new_config["limits"]["cpu"] - 250, self.min_cpu)
+        if mask & CPU_LOW:
+            new_config.lim_cpu = max(new_config.lim_cpu - 250, self.min_cpu)
             adaptations.append("decrease_cpu")
         
         # situation of decreasing memory
-        if "memory_low" in unhealthy_metrics:
-            new_config["limits"]["memory"] = max(new_config["limits"]["memory"] - 256, self.min_memory)
+        if mask & MEMORY_LOW:
+            new_config.lim_mem = max(new_config.lim_mem - 256, self.min_memory)
             adaptations.append("decrease_memory")
 
         ## Horizontal Scale Up & Scale Down
         # situation of increasing replica
-        if ((new_config["limits"]["cpu"] >= self.max_cpu or new_config["limits"]["memory"] >= self.max_memory) and 
-            ("latency_avg_high" in unhealthy_metrics or "error_rate_high" in unhealthy_metrics)):
-            new_config["replica"] = min(new_config["replica"] + 1, self.max_replica)
+        if ((new_config.lim_cpu >= self.max_cpu or new_config.lim_mem >= self.max_memory) and 
+            mask & LATENCY_OR_ERRORS_HIGH):
+            new_config.replica = min(new_config.replica + 1, self.max_replica)
             adaptations.append("increase_replica")
 
         # situation of decreasing replica
-        if "cpu_low" in unhealthy_metrics and "memory_low" in unhealthy_metrics:
-            new_config["replica"] = max(new_config["replica"] - 1, self.min_replica)
+        if mask & CPU_AND_MEMORY_LOW == CPU_AND_MEMORY_LOW:
+            new_config.replica = max(new_config.replica - 1, self.min_replica)
             adaptations.append("decrease_replica")
         
         return new_config
 
     def _adopt_qos_unhealthy_situation(self, unhealthy_metrics, new_config, adaptations, svc):
+        mask = qos_metric_mask(unhealthy_metrics)
+
         ## Vertical Scale Up & Scale Down
         # situation of increasing cpu
-        if "cpu_high" in unhealthy_metrics and "latency_avg_high" in unhealthy_metrics:
-            new_config["requests"]["cpu"] = min(new_config["requests"]["cpu"] + 250, self.max_cpu)
-            new_config["limits"]["cpu"] = min(new_config["limits"]["cpu"] + 250, self.max_cpu)
+        if mask & CPU_AND_LATENCY_HIGH == CPU_AND_LATENCY_HIGH:
+            new_config.req_cpu = min(new_config.req_cpu + 250, self.max_cpu)
+            new_config.lim_cpu = min(new_config.lim_cpu + 250, self.max_cpu)
             adaptations.append("increase_cpu")
 
         # situation of increasing memory
-        if "memory_high" in unhealthy_metrics:
-            new_config["requests"]["memory"] = min(new_config["requests"]["memory"] + 256, self.max_memory)
-            new_config["limits"]["memory"] = min(new_config["limits"]["memory"] + 256, self.max_memory)
+        if mask & MEMORY_HIGH:
+            new_config.req_mem = min(new_config.req_mem + 256, self.max_memory)
+            new_config.lim_mem = min(new_config.lim_mem + 256, self.max_memory)
             adaptations.append("increase_memory")
 
         # situation of decreasing CPU
-        if "cpu_low" in unhealthy_metrics:
-            new_config["requests"]["cpu"] = max(new_config["requests"]["cpu"] - 250, self.min_cpu)
-            new_config["limits"]["cpu"] = max(new_config["limits"]["cpu"] - 250, self.min_cpu)
+        if mask & CPU_LOW:
+            new_config.req_cpu = max(new_config.req_cpu - 250, self.min_cpu)
+            new_config.lim_cpu = max(new_config.lim_cpu - 250, self.min_cpu)
             adaptations.append("decrease_cpu")
         
         # situation of decreasing memory
-        if "memory_low" in unhealthy_metrics:
-            new_config["requests"]["memory"] = max(new_config["requests"]["memory"] - 256, self.min_memory)
-            new_config["limits"]["memory"] = max(new_config["limits"]["memory"] - 256, self.min_memory)
+        if mask & MEMORY_LOW:
+            new_config.req_mem = max(new_config.req_mem - 256, self.min_memory)
+            new_config.lim_mem = max(new_config.lim_mem - 256, self.min_memory)
             adaptations.append("decrease_memory")
 
         ## Horizontal Scale Up & Scale Down
         # situation of increasing replica
-        if (("latency_avg_high" in unhealthy_metrics or "error_rate_high" in unhealthy_metrics) and 
-            ("cpu_high" in unhealthy_metrics or "memory_high" in unhealthy_metrics)):
-            new_config["replica"] = min(new_config["replica"] + 1, self.max_replica)
+        if mask & LATENCY_OR_ERRORS_HIGH and mask & CPU_OR_MEMORY_HIGH:
+            new_config.replica = min(new_config.replica + 1, self.max_replica)
             adaptations.append("increase_replica")
 
         # situation of decreasing replica
-        if "cpu_low" in unhealthy_metrics and "memory_low" in unhealthy_metrics:
-            new_config["replica"] = max(new_config["replica"] - 1, self.min_replica)
+        if mask & CPU_AND_MEMORY_LOW == CPU_AND_MEMORY_LOW:
+            new_config.replica = max(new_config.replica - 1, self.min_replica)
             adaptations.append("decrease_replica")
         
         return new_config
     
     def _adopt_qoe_unhealthy_situation(self, unhealthy_metrics, new_config, adaptations, svc):
         # situation of decreasing song quality
-        if "playback_latency_high" in unhealthy_metrics and "download_time_high" in unhealthy_metrics:
-            new_config["song_quality"] = max(new_config["song_quality"] - 1, 1)
+        if PLAYBACK_AND_DOWNLOAD_HIGH <= unhealthy_metrics:
+            new_config.song_quality = max(new_config.song_quality - 1, 1)
 
         # situation of increasing song quality
-        if "playback_latency_low" in unhealthy_metrics and "download_time_low" in unhealthy_metrics:
-            new_config["song_quality"] = min(new_config["song_quality"] + 1, 3)
+        if PLAYBACK_AND_DOWNLOAD_LOW <= unhealthy_metrics:
+            new_config.song_quality = min(new_config.song_quality + 1, 3)
         
         # situation of decreasing cache size
         if "cache_hit_high" in unhealthy_metrics:
-            new_config["cache_size"] = new_config["cache_size"] - 100
+            new_config.cache_size = new_config.cache_size - 100
         
         # situation of increasing cache size
         if "cache_hit_low" in unhealthy_metrics:
-            new_config["cache_size"] = new_config["cache_size"] + 500
+            new_config.cache_size = new_config.cache_size + 500
                 
         # situation of decreasing preload song
-        if "download_time_high" in unhealthy_metrics and "cache_hit_low" in unhealthy_metrics:
-            new_config["preload_song"] = max(new_config["preload_song"] - 2, 0)
+        if DOWNLOAD_HIGH_CACHE_LOW <= unhealthy_metrics:
+            new_config.preload_song = max(new_config.preload_song - 2, 0)
         
         # situation of increasing preload song
         if "download_time_low" in unhealthy_metrics:
-            new_config["preload_song"] = min(new_config["preload_song"] + 2, 10)
+            new_config.preload_song = min(new_config.preload_song + 2, 10)
         
         return new_config
     
     @staticmethod
     def _pareto_frontier(candidates):
+        # sweep in (cpu, latency) order: a candidate is on the frontier iff it beats the best latency
+        # seen so far, everything earlier already uses no more CPU
         frontier = []
-        for i, c1 in enumerate(candidates):
-            dominated = False
-            for j, c2 in enumerate(candidates):
-                if i == j:
-                    continue
-                if ((c2["cpu_after"] <= c1["cpu_after"]) and
-                    (c2["latency_after"] <= c1["latency_after"]) and
-                    ((c2["cpu_after"] < c1["cpu_after"]) or 
-                    (c2["latency_after"] < c1["latency_after"]))):
-                    dominated = True
-                    break
-            if not dominated:
-                frontier.append(c1)
-        return frontier
\ No newline at end of file
+        best_latency = float("inf")
+        for c in sorted(candidates, key=lambda c: (c.cpu_after, c.latency_after)):
+            latency = c.latency_after
+            if latency < best_latency:
+                frontier.append(c)
+                best_latency = latency
+            elif frontier and latency == best_latency and c.cpu_after == frontier[-1].cpu_after:
+                # exact duplicate of the last frontier point, neither dominates the other
+                frontier.append(c)
+        return frontier
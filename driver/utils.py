@@ -1,98 +1,127 @@
 import csv
+import atexit
+import logging
+from collections import defaultdict
 
-import pandas as pd
+log = logging.getLogger("mapek.utils")
+
+# dataset columns, in file order
+HEADERS = (
+    'timestamp', 
+    'service', 
+    'cpu.quota.used.percent', 
+    'memory.limit.used.percent', 
+    'jvm.heap.used.percent',
+    'jvm.gc.global.time', 
+    'kubernetes.deployment.replicas.available', 
+    'net.http.request.time', 
+    'net.request.count.in', 
+    'net.http.error.count',
+    'net.request.time.in',
+    'net.bytes.in',
+    'net.bytes.out',
+    'net.bytes.total',
+    'jvm.nonHeap.used.percent',
+    'jvm.thread.count',
+    'jvm.gc.global.count'
+)
+
+# (metric id, aggregation) of the monitored metrics -> dataset column
+METRIC_MAP = {
+    ("cpu.quota.used.percent", "avg"): "cpu.quota.used.percent",
+    ("memory.limit.used.percent", "avg"): "memory.limit.used.percent",
+    ("jvm.heap.used.percent", "avg"): "jvm.heap.used.percent",
+    ("jvm.gc.global.time", "avg"): "jvm.gc.global.time",
+    ("kubernetes.deployment.replicas.available", "max"): "kubernetes.deployment.replicas.available",
+    ("net.http.request.time", "max"): "net.http.request.time",
+    ("net.request.count.in", "sum"): "net.request.count.in",
+    ("net.http.error.count", "sum"): "net.http.error.count",
+    ("net.request.time.in", "max"): "net.request.time.in",
+    ("net.bytes.in", "max"): "net.bytes.in",
+    ("net.bytes.out", "max"): "net.bytes.out",
+    ("net.bytes.total", "max"): "net.bytes.total",
+    ("jvm.nonHeap.used.percent", "avg"): "jvm.nonHeap.used.percent",
+    ("jvm.thread.count", "max"): "jvm.thread.count",
+    ("jvm.gc.global.count", "sum"): "jvm.gc.global.count"
+}
+
+# (metric id, aggregation) -> index of its column among the metric columns (HEADERS[2:])
+N_COLUMNS = len(HEADERS) - 2
+COL_IDX = {key: HEADERS.index(header) - 2 for key, header in METRIC_MAP.items()}
+
+# empty field for missing values (None/NaN), shortest round-tripping repr otherwise
+def _fmt(value):
+    if value is None or value != value:
+        return ""
+    return str(value)
 
 # Initialize CSV file with headers
 def init_csv(csv_file):
-    headers = [
-        'timestamp', 
-        'service', 
-        'cpu.quota.used.percent', 
-        'memory.limit.used.percent', 
-        'jvm.heap.used.percent',
-        'jvm.gc.global.time', 
-        'kubernetes.deployment.replicas.available', 
-        'net.http.request.time', 
-        'net.request.count.in', 
-        'net.http.error.count',
-        'net.request.time.in',
-        'net.bytes.in',
-        'net.bytes.out',
-        'net.bytes.total',
-        'jvm.nonHeap.used.percent',
-        'jvm.thread.count',
-        'jvm.gc.global.count'
-    ]
     with open(csv_file, 'w', newline='') as f:
         writer = csv.writer(f)
-        writer.writerow(headers)
+        writer.writerow(HEADERS)
 
-def append_to_csv(csv_file, timestamp, data_dict, service_to_use):
-    metric_map = {
-        ("cpu.quota.used.percent", "avg"): "cpu.quota.used.percent",
-        ("memory.limit.used.percent", "avg"): "memory.limit.used.percent",
-        ("jvm.heap.used.percent", "avg"): "jvm.heap.used.percent",
-        ("jvm.gc.global.time", "avg"): "jvm.gc.global.time",
-        ("kubernetes.deployment.replicas.available", "max"): "kubernetes.deployment.replicas.available",
-        ("net.http.request.time", "max"): "net.http.request.time",
-        ("net.request.count.in", "sum"): "net.request.count.in",
-        ("net.http.error.count", "sum"): "net.http.error.count",
-        ("net.request.time.in", "max"): "net.request.time.in",
-        ("net.bytes.in", "max"): "net.bytes.in",
-        ("net.bytes.out", "max"): "net.bytes.out",
-        ("net.bytes.total", "max"): "net.bytes.total",
-        ("jvm.nonHeap.used.percent", "avg"): "jvm.nonHeap.used.percent",
-        ("jvm.thread.count", "max"): "jvm.thread.count",
-        ("jvm.gc.global.count", "sum"): "jvm.gc.global.count"
-    }
+def _aggregate(rows, service_to_use):
+    # per-service list of column means, None where a metric had no value; the metrics API
+    # returns tens of points per cycle, a plain sum/count pass beats setting up a DataFrame
+    sums = defaultdict(float)
+    counts = defaultdict(int)
+    for col, svc, value in rows:
+        if value is None:
+            continue
+        sums[(svc, col)] += value
+        counts[(svc, col)] += 1
+    table = {svc: [None] * N_COLUMNS for svc in service_to_use}
+    for (svc, col), n in counts.items():
+        row = table.get(svc)
+        if row is not None:
+            row[col] = sums[(svc, col)] / n
+    return [table[svc] for svc in service_to_use]
 
-    service_data = {svc: {col: None for col in metric_map.values()} for svc in service_to_use}
+# dataset file kept open (in append mode, 64 KiB buffered) across cycles; rows are kept in memory
+# and written every flush_every cycles, and by close() at interpreter exit so a normal shutdown loses nothing
+class BufferedCsvAppender:
+    def __init__(self, path, service_to_use, flush_every=5):
+        init_csv(path)
+        self.service_to_use = service_to_use
+        self.flush_every = flush_every
+        self.buf = []
+        self.f = open(path, "a", newline='', buffering=1 << 16)
+        atexit.register(self.close)
 
-    for (metric_id, agg), res in data_dict.items():
-        if (metric_id, agg) not in metric_map:
-            continue
+    def flush(self):
+        if self.buf:
+            self.f.write("".join(self.buf))
+            self.buf.clear()
+        self.f.flush()
+
+    def close(self):
+        if not self.f.closed:
+            self.flush()
+            self.f.close()
+
+    def append(self, timestamp, data_dict):
+        # collect (column, service, value) of every metric first and aggregate them all in one pass
+        rows = []
+        for key, res in data_dict.items():
+            col = COL_IDX.get(key)
+            if col is None:
+                continue
             
+            try:
+                rows.extend([(col, e['d'][0], e['d'][1]) for e in res["data"]])
+            except Exception as e:
+                continue
+
         try:
-            header = metric_map[(metric_id, agg)]
-            df = pd.DataFrame([{
-                "timestamp": e['t'], "service": e['d'][0], "value": e['d'][1]
-            } for e in res["data"]])
-            
-            df_filtered = df[df['service'].isin(service_to_use)]
-            
-            if not df_filtered.empty:
-                avg_values = df_filtered.groupby("service")["value"].mean()
-                
-                for svc, val in avg_values.items():
-                    if svc in service_to_use:
-                        service_data[svc][header] = val
+            table = _aggregate(rows, self.service_to_use)
+            # timestamp, service names and numbers never need quoting, so rows are joined by hand
+            # and written in one go instead of going through csv.writer field by field
+            lines = [f"{timestamp},{svc}," + ",".join(map(_fmt, values)) + "\n"
+                     for svc, values in zip(self.service_to_use, table)]
+            self.buf.append("".join(lines))
+            if len(self.buf) >= self.flush_every:
+                self.flush()
+                log.info("Data up to timestamp %s appended to CSV successfully", timestamp)
         except Exception as e:
-            continue
-
-    try:
-        with open(csv_file, "a", newline='') as f:
-            writer = csv.writer(f)
-            for svc in service_to_use:
-                row = [
-                    timestamp,
-                    svc,
-                    service_data[svc].get("cpu.quota.used.percent"),
-                    service_data[svc].get("memory.limit.used.percent"),
-                    service_data[svc].get("jvm.heap.used.percent"),
-                    service_data[svc].get("jvm.gc.global.time"),
-                    service_data[svc].get("kubernetes.deployment.replicas.available"),
-                    service_data[svc].get("net.http.request.time"),
-                    service_data[svc].get("net.request.count.in"),
-                    service_data[svc].get("net.http.error.count"),
-                    service_data[svc].get("net.request.time.in"),
-                    service_data[svc].get("net.bytes.in"),
-                    service_data[svc].get("net.bytes.out"),
-                    service_data[svc].get("net.bytes.total"),
-                    service_data[svc].get("jvm.nonHeap.used.percent"),
-                    service_data[svc].get("jvm.thread.count"),
-                    service_data[svc].get("jvm.gc.global.count"),
-                ]
-                writer.writerow(row)
-        print(f"Data for timestamp {timestamp} appended to CSV successfully")
-    except Exception as e:
-        print(f"Error writing to CSV: {e}")
\ No newline at end of file
+            log.error("Error writing to CSV: %s", e)